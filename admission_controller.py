@@ -0,0 +1,199 @@
+import math
+import time
+import logging
+import threading
+
+from typing import Callable, Optional
+from downloader import Downloader
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Bytes per second of a 128 kbps MP3, used when only the size is known
+DEFAULT_BYTES_PER_SECOND = 16000
+
+
+class Admission_Rejected(Exception):
+    """
+    Raised when a request is not admitted.
+
+    Attributes:
+        status_code (int): 429 if the service is busy, 413 if the episode is too long.
+        retry_after (int | None): Seconds after which a retry is likely to be admitted.
+    """
+
+    def __init__(self, message: str, status_code: int, retry_after: int | None = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class Admission_Controller:
+    """
+    Admits, queues or rejects requests based on an upfront estimate of their work.
+
+    The estimate is derived from the episode duration (or its size, if the
+    duration is unknown): ASR seconds = duration * `asr_realtime_factor` and
+    LLM tokens = duration in minutes * `tokens_per_audio_minute`.
+
+    A request is admitted if its estimate fits next to the work already in
+    flight (`max_inflight_asr_seconds`, `max_inflight_llm_tokens`). Otherwise it
+    waits up to `max_wait_seconds` for capacity as long as the waiting work
+    stays under `max_queued_asr_seconds`, and is rejected with a Retry-After
+    hint when it does not.
+
+    With a `load_provider` (queue mode) the in-flight work is read from the
+    shared queue instead, and requests are never held in process: they are
+    either enqueued or rejected.
+    """
+
+    def __init__(
+        self,
+        config: dict,
+        load_provider: Optional[Callable[[], float]] = None,
+    ):
+        """
+        Parameters:
+            config (dict): The "admission" section of the configuration.
+            load_provider (Callable, optional): Returns the estimated ASR seconds of all pending work.
+        """
+        self.config = config
+        self.enabled = config.get("enabled", False)
+        self.load_provider = load_provider
+
+        self.max_episode_seconds = config.get("max_episode_seconds", 4 * 3600)
+        self.max_inflight_asr_seconds = config.get("max_inflight_asr_seconds", 3600)
+        self.max_inflight_llm_tokens = config.get("max_inflight_llm_tokens", 200000)
+        self.max_queued_asr_seconds = config.get("max_queued_asr_seconds", 3600)
+        self.max_wait_seconds = config.get("max_wait_seconds", 30)
+        self.parallelism = config.get("parallelism", 1)
+
+        self._inflight_count = 0
+        self._inflight_asr = 0.0
+        self._inflight_tokens = 0.0
+        self._queued_asr = 0.0
+        self._condition = threading.Condition()
+
+    def probe(
+        self, downloader: Downloader, source_url: str, episode_name: str | None
+    ) -> dict | None:
+        """
+        Probes an episode and estimates its work.
+
+        Returns:
+            dict | None: The estimate (see `estimate`), or None if admission control is disabled.
+        """
+        if not self.enabled:
+            return None
+
+        try:
+            probe = downloader.probe_episode(source_url, episode_name)
+        except Exception as e:
+            logger.warning(f"Failed to probe episode, using the default estimate: {e}")
+            probe = {}
+        return self.estimate(probe)
+
+    def estimate(self, probe: dict) -> dict:
+        """
+        Estimates the work of an episode from a downloader probe.
+
+        Parameters:
+            probe (dict): Result of `Downloader.probe_episode`.
+
+        Returns:
+            dict: "duration_seconds", "asr_seconds" and "llm_tokens".
+        """
+        duration = probe.get("duration_seconds")
+        if not duration and probe.get("size_bytes"):
+            duration = probe["size_bytes"] / DEFAULT_BYTES_PER_SECOND
+        if not duration:
+            duration = self.config.get("default_duration_seconds", 3600)
+
+        return {
+            "duration_seconds": duration,
+            "asr_seconds": duration * self.config.get("asr_realtime_factor", 0.3),
+            "llm_tokens": duration / 60 * self.config.get("tokens_per_audio_minute", 200),
+        }
+
+    @contextmanager
+    def admit(self, estimate: dict | None):
+        """
+        Holds capacity for the estimated work while the block runs.
+
+        Parameters:
+            estimate (dict | None): Result of `probe`; None admits the request unconditionally.
+
+        Raises:
+            Admission_Rejected: If the request cannot be admitted.
+        """
+        if estimate is None:
+            yield
+            return
+
+        if estimate["duration_seconds"] > self.max_episode_seconds:
+            raise Admission_Rejected(
+                f"Episodes longer than {self.max_episode_seconds / 60:.0f} minutes are not accepted.",
+                status_code=413,
+            )
+
+        if self.load_provider is not None:
+            self._admit_to_queue(estimate)
+            yield
+            return
+
+        self._acquire(estimate)
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._inflight_count -= 1
+                self._inflight_asr -= estimate["asr_seconds"]
+                self._inflight_tokens -= estimate["llm_tokens"]
+                self._condition.notify_all()
+
+    def _acquire(self, estimate: dict):
+        asr, tokens = estimate["asr_seconds"], estimate["llm_tokens"]
+
+        with self._condition:
+            if not self._fits(asr, tokens):
+                if self._queued_asr + asr > self.max_queued_asr_seconds:
+                    raise self._busy(self._inflight_asr + self._queued_asr + asr)
+
+                self._queued_asr += asr
+                try:
+                    deadline = time.monotonic() + self.max_wait_seconds
+                    while not self._fits(asr, tokens):
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise self._busy(self._inflight_asr + self._queued_asr)
+                        self._condition.wait(remaining)
+                finally:
+                    self._queued_asr -= asr
+
+            self._inflight_count += 1
+            self._inflight_asr += asr
+            self._inflight_tokens += tokens
+
+    def _fits(self, asr: float, tokens: float) -> bool:
+        # An idle service always takes the request, however large, so it cannot starve
+        if self._inflight_count == 0:
+            return True
+        return (
+            self._inflight_asr + asr <= self.max_inflight_asr_seconds
+            and self._inflight_tokens + tokens <= self.max_inflight_llm_tokens
+        )
+
+    def _admit_to_queue(self, estimate: dict):
+        pending_asr = self.load_provider()
+        capacity = self.max_inflight_asr_seconds + self.max_queued_asr_seconds
+        if pending_asr > 0 and pending_asr + estimate["asr_seconds"] > capacity:
+            raise self._busy(pending_asr + estimate["asr_seconds"] - capacity)
+
+    def _busy(self, backlog_asr_seconds: float) -> Admission_Rejected:
+        retry_after = max(1, math.ceil(backlog_asr_seconds / self.parallelism))
+        logger.info(f"Rejecting request, retry after {retry_after}s")
+        return Admission_Rejected(
+            "The service is busy, please retry later.",
+            status_code=429,
+            retry_after=retry_after,
+        )
@@ -1,9 +1,20 @@
+import time
+
+# Import-to-ready time is measured from here
+START_TIME = time.perf_counter()
+
 import json
+import uuid
 import logging
 
 from flask_cors import CORS, cross_origin
 from dotenv import load_dotenv
 from flask import Flask, request, jsonify
+from pipeline import run_pipeline
+from job_queue import SQLite_Job_Queue
+from scheduler import PRIORITIES, Pipeline_Scheduler
+from admission_controller import Admission_Controller, Admission_Rejected
+from utils.profiling_utils import get_profiler
 from openai_summarizer import OpenAI_Summarizer
 from youtube_downloader import YouTube_Downloader
 from whisper_transcriber import Whisper_Transcriber
@@ -23,13 +34,52 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 yt_downloader = YouTube_Downloader(config=config["youtube"])
-rss_downloader = RSS_Feed_Downloader(config=config)
-transcriber = Whisper_Transcriber(config=config["whisper"])
-summarizer = OpenAI_Summarizer(config=config["openai"])
+rss_downloader = RSS_Feed_Downloader(config=config["rss"])
+
+# In queue mode this process only enqueues jobs; workers (worker.py) run them
+queue_config = config.get("queue", {})
+if queue_config.get("enabled", False):
+    job_queue = SQLite_Job_Queue(
+        queue_config.get("db_path", "queue/jobs.sqlite3"),
+        max_attempts=queue_config.get("max_attempts", 3),
+    )
+else:
+    job_queue = None
+    transcriber = Whisper_Transcriber(config=config["whisper"])
+    summarizer = OpenAI_Summarizer(config=config["openai"])
+    scheduler = Pipeline_Scheduler(config.get("scheduler", {}))
+
+admission = Admission_Controller(
+    config.get("admission", {}),
+    load_provider=job_queue.pending_asr_seconds if job_queue else None,
+)
 
 app = Flask(__name__)
 CORS(app, origins=["http://localhost:3000"])
 
+STARTUP_SECONDS = time.perf_counter() - START_TIME
+logger.info(f"Ready in {STARTUP_SECONDS:.3f}s")
+
+
+@app.route("/api/health", methods=["GET"])
+def health_endpoint():
+    """
+    Returns JSON with:
+      - ready: bool
+      - startup_seconds: float (import-to-ready time of this process)
+      - model_loaded: bool (whether the ASR model is loaded; always false on queue API processes)
+    """
+    return (
+        jsonify(
+            {
+                "ready": True,
+                "startup_seconds": round(STARTUP_SECONDS, 3),
+                "model_loaded": job_queue is None and transcriber.backend.loaded,
+            }
+        ),
+        200,
+    )
+
 
 @app.route("/api/summarize", methods=["POST"])
 @cross_origin()
@@ -40,16 +90,43 @@ def summarize_endpoint():
       - episode_name: str | null
       - detail_level: float (0.0–1.0)
       - platform: "youtube" or "rss"
+      - priority: "interactive" (default) or "bulk"
+    Send the header `X-Tenant` to account the work to a tenant for fair scheduling.
+    Send the header `X-Profile: 1` to profile the request (if "allow_header" is enabled in the "profiling" config).
     Returns JSON with:
       - success: bool
       - summary: str (if success)
       - error: str (if not)
+    In queue mode, responds with 202 and JSON with:
+      - success: bool
+      - job_id: str (poll /api/jobs/<job_id> for the result)
+    If admission control rejects the request, responds with 429 and a
+    Retry-After header when busy, or 413 when the episode is too long.
     """
     data = request.get_json()
     source_url = data.get("source_url")
     episode_name = data.get("episode_name")
     detail_level = data.get("detail_level", 0.0)
     platform = data.get("platform")
+    priority = data.get("priority", "interactive")
+    tenant = request.headers.get("X-Tenant", "default")
+
+    if priority not in PRIORITIES:
+        return (
+            jsonify(
+                {
+                    "success": False,
+                    "error": f"Unknown priority, choose one of: {', '.join(PRIORITIES)}.",
+                }
+            ),
+            400,
+        )
+
+    profiling_config = config.get("profiling", {})
+    profile_requested = (
+        profiling_config.get("allow_header", False)
+        and request.headers.get("X-Profile") == "1"
+    )
 
     # pick downloader
     if platform == "youtube":
@@ -57,40 +134,95 @@ def summarize_endpoint():
     else:
         downloader = rss_downloader
 
-    try:
-        # 1) Download
-        mp3_path, metadata = downloader.download_episode(source_url, episode_name)
-        logger.info(f"Downloaded {metadata.get('title', '')}")
+    # Estimate the work from the episode duration before committing to it
+    estimate = admission.probe(downloader, source_url, episode_name)
 
-        # 2) Transcribe
-        text = transcriber.transcribe(
-            audio_path=mp3_path, video_id=metadata.get("id", "")
-        )
-        logger.info("Transcription complete")
+    if job_queue is not None:
+        try:
+            with admission.admit(estimate):
+                job_id = job_queue.enqueue(
+                    {
+                        "source_url": source_url,
+                        "episode_name": episode_name,
+                        "detail_level": detail_level,
+                        "platform": platform,
+                        "priority": priority,
+                        "tenant": tenant,
+                        "profile": profile_requested,
+                        "estimate": estimate,
+                    }
+                )
+        except Admission_Rejected as e:
+            return _rejected_response(e)
+        return jsonify({"success": True, "job_id": job_id}), 202
 
-        # 3) Summarize
-        summary = summarizer.summarize(text, detail=detail_level)
-        logger.info("Summarization complete")
+    profiler = get_profiler(
+        profiling_config,
+        request_id=uuid.uuid4().hex[:12],
+        requested=profile_requested,
+    )
 
-        return (
-            jsonify(
-                {
-                    "success": True,
-                    "title": metadata.get("title", ""),
-                    "summary": summary,
-                    "thumbnail": metadata.get("thumbnail", ""),
-                    "channel": metadata.get("channel", ""),
-                    "duration_string": metadata.get("duration_string", ""),
-                    "release_date": metadata.get("release_date", ""),
-                }
-            ),
-            200,
-        )
+    try:
+        with admission.admit(estimate):
+            result = run_pipeline(
+                downloader=downloader,
+                transcriber=transcriber,
+                summarizer=summarizer,
+                source_url=source_url,
+                episode_name=episode_name,
+                detail_level=detail_level,
+                profiler=profiler,
+                scheduler=scheduler,
+                priority=priority,
+                tenant=tenant,
+            )
+        return jsonify({"success": True, **result}), 200
+
+    except Admission_Rejected as e:
+        return _rejected_response(e)
 
     except Exception as e:
         logger.exception("Error in /summarize")
         return jsonify({"success": False, "error": str(e)}), 500
 
 
+def _rejected_response(e: Admission_Rejected):
+    """Builds the 429/413 response for a request turned away by admission control."""
+    response = jsonify({"success": False, "error": str(e)})
+    if e.retry_after is not None:
+        response.headers["Retry-After"] = str(e.retry_after)
+    return response, e.status_code
+
+
+@app.route("/api/jobs/<job_id>", methods=["GET"])
+@cross_origin()
+def job_endpoint(job_id: str):
+    """
+    Returns the state of a queued job as JSON with:
+      - success: bool (False if the job failed or is unknown)
+      - status: "queued", "running", "done" or "failed"
+      - stage: str | null (the pipeline stage while running)
+      - summary and episode metadata (once done)
+      - error: str (if failed)
+    """
+    if job_queue is None:
+        return jsonify({"success": False, "error": "Queue mode is disabled."}), 404
+
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"success": False, "error": "Job not found."}), 404
+
+    body = {
+        "success": job["status"] != "failed",
+        "status": job["status"],
+        "stage": job["stage"],
+    }
+    if job["status"] == "done":
+        body.update(job["result"])
+    elif job["status"] == "failed":
+        body["error"] = job["error"]
+    return jsonify(body), 200
+
+
 if __name__ == "__main__":
     app.run()
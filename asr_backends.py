@@ -0,0 +1,329 @@
+import os
+import json
+import math
+import logging
+import threading
+
+from typing import Callable, Optional
+from utils.openai_utils import create_openai_client
+from utils.checkpoint_utils import read_checkpoint, write_checkpoint
+
+logger = logging.getLogger(__name__)
+
+MAX_FILE_SIZE_MB = 25
+MAX_FILE_SIZE_BYTES = MAX_FILE_SIZE_MB * 1024 * 1024
+
+
+class ASR_Backend:
+    """
+    Base class for speech recognition engines used by Whisper_Transcriber.
+
+    Heavy dependencies and model weights are loaded by `_load_model` on first
+    use (or by `warm_up` in the background), not when the backend is created.
+
+    Attributes:
+        config (dict): The "whisper" section of the configuration.
+        verbose (bool): Flag to enable or disable verbose logs.
+    """
+
+    def __init__(self, config: dict):
+        self.config = config
+        self.verbose = config.get("verbose", False)
+        self._model = None
+        self._model_lock = threading.Lock()
+
+    @property
+    def model(self):
+        """The loaded model, loaded on first access."""
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    self._model = self._load_model()
+        return self._model
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    def warm_up(self) -> threading.Thread:
+        """Loads the model on a background thread so the first request does not wait for it."""
+        thread = threading.Thread(
+            target=lambda: self.model, name="asr-warm-up", daemon=True
+        )
+        thread.start()
+        return thread
+
+    def _load_model(self):
+        pass
+
+    def transcribe(
+        self,
+        audio_path: str,
+        video_id: str,
+        progress: Optional[Callable[[float, float], None]] = None,
+        on_segment: Optional[Callable[[str], None]] = None,
+    ) -> str:
+        """
+        Transcribes an audio file.
+
+        Args:
+            audio_path (str): The file path of the audio to be transcribed.
+            video_id (str): Unique identifier for the audio/video.
+            progress (Callable, optional): Called as `progress(done, total)` as the audio is processed.
+            on_segment (Callable, optional): Called with each piece of text as soon as it is transcribed; the pieces concatenate to the result.
+
+        Returns:
+            str: The transcribed text.
+        """
+        pass
+
+
+class Whisper_Backend(ASR_Backend):
+    """
+    Runs the reference PyTorch Whisper model locally.
+
+    The reference model only returns text once the whole file is decoded, so
+    when segments are requested the audio is transcribed in windows of
+    `stream_window_seconds`, each prompted with the end of the previous one.
+    """
+
+    def _load_model(self):
+        import whisper
+
+        return whisper.load_model(self.config.get("model", "base"))
+
+    def transcribe(
+        self,
+        audio_path: str,
+        video_id: str,
+        progress: Optional[Callable[[float, float], None]] = None,
+        on_segment: Optional[Callable[[str], None]] = None,
+    ) -> str:
+        if on_segment is None:
+            result = self.model.transcribe(audio_path)
+            if progress:
+                progress(1, 1)
+            return result.get("text", "")
+
+        import whisper
+
+        audio = whisper.load_audio(audio_path)
+        window = int(
+            self.config.get("stream_window_seconds", 300) * whisper.audio.SAMPLE_RATE
+        )
+
+        texts = []
+        for start in range(0, len(audio), window):
+            result = self.model.transcribe(
+                audio[start : start + window],
+                initial_prompt=texts[-1][-200:] if texts else None,
+            )
+            texts.append(result.get("text", ""))
+            on_segment(texts[-1])
+            if progress:
+                progress(min(start + window, len(audio)), len(audio))
+        return "".join(texts)
+
+
+class Faster_Whisper_Backend(ASR_Backend):
+    """
+    Runs Whisper through CTranslate2 (faster-whisper) with quantized weights.
+
+    With the default `int8` compute type on CPU this is several times faster
+    than the PyTorch fp32 model and uses a fraction of the memory.
+    """
+
+    def _load_model(self):
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError as e:
+            raise ImportError(
+                "The 'faster_whisper' backend requires the faster-whisper package "
+                "(pip install faster-whisper)."
+            ) from e
+
+        return WhisperModel(
+            self.config.get("model", "base"),
+            device=self.config.get("device", "cpu"),
+            compute_type=self.config.get("compute_type", "int8"),
+            cpu_threads=self.config.get("cpu_threads", 0),
+        )
+
+    def transcribe(
+        self,
+        audio_path: str,
+        video_id: str,
+        progress: Optional[Callable[[float, float], None]] = None,
+        on_segment: Optional[Callable[[str], None]] = None,
+    ) -> str:
+        # Segments are produced lazily, decoding happens while iterating
+        segments, info = self.model.transcribe(
+            audio_path,
+            beam_size=self.config.get("beam_size", 5),
+            vad_filter=self.config.get("vad_filter", False),
+        )
+
+        texts = []
+        for segment in segments:
+            texts.append(segment.text)
+            if on_segment:
+                on_segment(segment.text)
+            if progress:
+                progress(min(segment.end, info.duration), info.duration)
+        return "".join(texts)
+
+
+class OpenAI_API_Backend(ASR_Backend):
+    """
+    Sends audio to the hosted `whisper-1` API, splitting files above 25MB.
+
+    If "checkpoint" is enabled, the text of every slice is checkpointed so a
+    retry only transcribes the missing slices.
+    """
+
+    def _load_model(self):
+        return create_openai_client()
+
+    @property
+    def client(self):
+        """The OpenAI client; the hosted model needs no local weights."""
+        return self.model
+
+    def transcribe(
+        self,
+        audio_path: str,
+        video_id: str,
+        progress: Optional[Callable[[float, float], None]] = None,
+        on_segment: Optional[Callable[[str], None]] = None,
+    ) -> str:
+        if os.path.getsize(audio_path) <= MAX_FILE_SIZE_BYTES:
+            # File is within size limit, process directly
+            with open(audio_path, "rb") as audio_file:
+                result = self.client.audio.transcriptions.create(
+                    model="whisper-1", file=audio_file, response_format="json"
+                )
+            if on_segment:
+                on_segment(result.text)
+            if progress:
+                progress(1, 1)
+            return result.text
+
+        if self.verbose:
+            size_mb = os.path.getsize(audio_path) / (1024 * 1024)
+            logger.info(
+                f"Audio file exceeds 25MB ({size_mb:.2f} MB), splitting into chunks..."
+            )
+
+        base_dir = os.path.join(
+            os.getcwd(),
+            self.config.get("downloads_dir", "downloads"),
+            video_id,
+        )
+        checkpoint_dir = os.path.join(base_dir, "checkpoints")
+        manifest_path = os.path.join(checkpoint_dir, "slices.json")
+        checkpoint = self.config.get("checkpoint", True)
+
+        # The slice layout is stored so a retry can skip decoding the audio
+        # when every slice is already transcribed
+        audio = None
+        manifest = read_checkpoint(manifest_path) if checkpoint else None
+        if manifest is not None:
+            manifest = json.loads(manifest)
+            duration_ms = manifest["duration_ms"]
+            chunk_duration_ms = manifest["chunk_duration_ms"]
+        else:
+            audio = self._load_audio(audio_path)
+            duration_ms = len(audio)
+            estimated_size_per_ms = os.path.getsize(audio_path) / duration_ms
+            chunk_duration_ms = int(MAX_FILE_SIZE_BYTES / estimated_size_per_ms)
+            if checkpoint:
+                write_checkpoint(
+                    manifest_path,
+                    json.dumps(
+                        {
+                            "duration_ms": duration_ms,
+                            "chunk_duration_ms": chunk_duration_ms,
+                        }
+                    ),
+                )
+
+        chunks = math.ceil(duration_ms / chunk_duration_ms)
+
+        os.makedirs(base_dir, exist_ok=True)
+
+        transcribed_text = ""
+        for i in range(chunks):
+            slice_path = os.path.join(checkpoint_dir, f"slice_{i + 1}.txt")
+            slice_text = read_checkpoint(slice_path) if checkpoint else None
+
+            if slice_text is None:
+                if audio is None:
+                    audio = self._load_audio(audio_path)
+
+                start_ms = i * chunk_duration_ms
+                end_ms = min((i + 1) * chunk_duration_ms, duration_ms)
+                chunk = audio[start_ms:end_ms]
+
+                chunk_path = os.path.join(
+                    base_dir, f"{video_id}_{i+1}{self.config.get('mp3_ext', '.mp3')}"
+                )
+
+                chunk.export(chunk_path, format="mp3")
+
+                with open(chunk_path, "rb") as audio_file:
+                    result = self.client.audio.transcriptions.create(
+                        model="whisper-1", file=audio_file, response_format="json"
+                    )
+                    slice_text = result.text
+
+                if checkpoint:
+                    write_checkpoint(slice_path, slice_text)
+                os.remove(chunk_path)
+
+                if self.verbose:
+                    logger.info(f"Processed chunk {i + 1} of {chunks}")
+            elif self.verbose:
+                logger.info(f"Reusing checkpoint for chunk {i + 1} of {chunks}")
+
+            transcribed_text += slice_text
+            if on_segment:
+                on_segment(slice_text)
+
+            if progress:
+                progress(i + 1, chunks)
+
+        return transcribed_text
+
+    def _load_audio(self, audio_path: str):
+        """Decodes the audio file with pydub."""
+        from pydub import AudioSegment
+
+        return AudioSegment.from_file(audio_path)
+
+
+ASR_BACKENDS = {
+    "whisper": Whisper_Backend,
+    "faster_whisper": Faster_Whisper_Backend,
+    "openai_api": OpenAI_API_Backend,
+}
+
+
+def get_asr_backend(config: dict) -> ASR_Backend:
+    """
+    Creates the speech recognition backend selected by `config["backend"]`.
+
+    Parameters:
+        config (dict): The "whisper" section of the configuration.
+
+    Returns:
+        ASR_Backend: The initialized backend.
+
+    Raises:
+        ValueError: If the backend name is unknown.
+    """
+    name = config.get("backend", "whisper")
+    if name not in ASR_BACKENDS:
+        raise ValueError(
+            f"Unknown ASR backend '{name}'. Choose one of: {', '.join(ASR_BACKENDS)}."
+        )
+    return ASR_BACKENDS[name](config)
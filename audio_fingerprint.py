@@ -0,0 +1,301 @@
+import os
+import sqlite3
+import logging
+import subprocess
+
+from typing import List
+from collections import Counter
+from contextlib import closing
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 8000
+FRAME_SIZE = 2048
+HOP_SIZE = 256
+NUM_BANDS = 33
+MIN_FREQUENCY = 300
+MAX_FREQUENCY = 2000
+FRAMES_PER_SECOND = SAMPLE_RATE / HOP_SIZE
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fingerprints (
+    episode_id TEXT PRIMARY KEY,
+    transcript_path TEXT NOT NULL,
+    fingerprint BLOB NOT NULL,
+    duration_seconds REAL
+);
+CREATE TABLE IF NOT EXISTS hashes (
+    value INTEGER NOT NULL,
+    episode_id TEXT NOT NULL,
+    position INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS hashes_by_value ON hashes (value);
+"""
+
+
+def compute_fingerprint(audio_path: str, seconds: float = 180) -> List[int]:
+    """
+    Computes a compact acoustic fingerprint of the beginning of an audio file.
+
+    The audio is decoded with ffmpeg to 8 kHz mono, so the same recording gives
+    the same fingerprint regardless of codec, bitrate or container. Every 32 ms
+    frame is reduced to a 32-bit sub-fingerprint: each bit tells whether the
+    energy difference between two adjacent frequency bands (300–2000 Hz) grew
+    since the previous frame. A truncated file (e.g. a partial download) can be
+    fingerprinted as long as it covers `seconds` of audio.
+
+    Parameters:
+        audio_path (str): Path of the audio file.
+        seconds (float, optional): Length of the fingerprinted prefix. Defaults to 180.
+
+    Returns:
+        List[int]: One 32-bit sub-fingerprint per frame.
+    """
+    import numpy as np
+
+    pcm = subprocess.run(
+        [
+            "ffmpeg", "-v", "quiet", "-i", audio_path, "-t", str(seconds),
+            "-ac", "1", "-ar", str(SAMPLE_RATE), "-f", "s16le", "-",
+        ],
+        stdout=subprocess.PIPE,
+        check=False,
+    ).stdout
+    samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32)
+    if len(samples) < FRAME_SIZE + HOP_SIZE:
+        return []
+
+    edges = np.geomspace(MIN_FREQUENCY, MAX_FREQUENCY, NUM_BANDS + 1)
+    bins = np.round(edges * FRAME_SIZE / SAMPLE_RATE).astype(int)
+    window = np.hanning(FRAME_SIZE).astype(np.float32)
+    frames = np.lib.stride_tricks.sliding_window_view(samples, FRAME_SIZE)[::HOP_SIZE]
+
+    # Band energies are computed in batches to bound memory use
+    energies = []
+    for start in range(0, len(frames), 512):
+        spectrum = np.abs(np.fft.rfft(frames[start : start + 512] * window)) ** 2
+        energies.append(
+            np.stack(
+                [spectrum[:, lo:hi].sum(axis=1) for lo, hi in zip(bins[:-1], bins[1:])],
+                axis=1,
+            )
+        )
+    energies = np.concatenate(energies)
+
+    band_diff = energies[:, :-1] - energies[:, 1:]
+    bits = (band_diff[1:] - band_diff[:-1]) > 0
+    weights = np.left_shift(np.uint64(1), np.arange(NUM_BANDS - 1, dtype=np.uint64))
+    return (bits.astype(np.uint64) * weights).sum(axis=1).astype(np.uint32).tolist()
+
+
+def frame_bit_errors(a: List[int], b: List[int], offset: int):
+    """
+    Counts the differing bits of every overlapping frame, with `b` shifted by `offset` frames relative to `a`.
+
+    Returns:
+        numpy.ndarray: Bit errors (0-32) per overlapping frame; empty without overlap.
+    """
+    import numpy as np
+
+    start_a, start_b = max(0, -offset), max(0, offset)
+    length = max(0, min(len(a) - start_a, len(b) - start_b))
+
+    xor = np.bitwise_xor(
+        np.asarray(a[start_a : start_a + length], dtype=np.uint32),
+        np.asarray(b[start_b : start_b + length], dtype=np.uint32),
+    )
+    return np.unpackbits(xor.view(np.uint8).reshape(-1, 4), axis=1).sum(axis=1)
+
+
+def bit_error_rate(a: List[int], b: List[int], offset: int) -> tuple:
+    """
+    Compares two fingerprints with `b` shifted by `offset` frames relative to `a`.
+
+    Returns:
+        tuple: (bit_error_rate (float), overlapping_frames (int)); the rate is 1.0 without overlap.
+    """
+    errors = frame_bit_errors(a, b, offset)
+    if len(errors) == 0:
+        return 1.0, 0
+    return float(errors.sum()) / (32 * len(errors)), len(errors)
+
+
+class Fingerprint_Index:
+    """
+    Maps audio fingerprints to transcripts that were already produced.
+
+    Candidates are found by exact matches of sub-fingerprints, voting on the
+    time offset between the two recordings, and are confirmed by the bit error
+    rate over the aligned overlap. Alignment lets a recording be matched even
+    if one source adds a short intro or pre-roll.
+
+    Episodes of the same show can share their opening (a theme or an inserted
+    pre-roll), so a match is only accepted if the audio after the matching
+    leading blocks matches as well. If the durations of both episodes are
+    known, they must also agree: after subtracting the pre-roll measured by the
+    alignment offset, they may differ by at most `max_duration_difference`
+    seconds, which leaves room for an inserted ad break.
+
+    The index is a SQLite file, so it can live next to the shared downloads.
+    """
+
+    def __init__(self, config: dict):
+        """
+        Parameters:
+            config (dict): The "fingerprint" section of the whisper configuration.
+        """
+        self.config = config
+        self.db_path = config.get(
+            "db_path", os.path.join("downloads", "_fingerprints.sqlite3")
+        )
+        self.seconds = config.get("seconds", 180)
+        self.max_bit_error_rate = config.get("max_bit_error_rate", 0.35)
+        self.min_overlap_frames = config.get("min_overlap_frames", 900)
+        self.min_votes = config.get("min_votes", 5)
+        self.max_duration_difference = config.get("max_duration_difference", 60)
+        self.block_frames = int(config.get("block_seconds", 10) * FRAMES_PER_SECOND)
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.executescript(SCHEMA)
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(fingerprints)")]
+            if "duration_seconds" not in columns:
+                conn.execute("ALTER TABLE fingerprints ADD COLUMN duration_seconds REAL")
+
+    def fingerprint(self, audio_path: str) -> List[int]:
+        return compute_fingerprint(audio_path, self.seconds)
+
+    def add(
+        self,
+        episode_id: str,
+        fingerprint: List[int],
+        transcript_path: str,
+        duration_seconds: float | None = None,
+    ):
+        """Records that `fingerprint` belongs to the episode transcribed at `transcript_path`."""
+        if not fingerprint:
+            return
+
+        import numpy as np
+
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM hashes WHERE episode_id = ?", (episode_id,))
+            conn.execute(
+                "INSERT OR REPLACE INTO fingerprints "
+                "(episode_id, transcript_path, fingerprint, duration_seconds) "
+                "VALUES (?, ?, ?, ?)",
+                (
+                    episode_id,
+                    transcript_path,
+                    np.asarray(fingerprint, dtype=np.uint32).tobytes(),
+                    duration_seconds,
+                ),
+            )
+            conn.executemany(
+                "INSERT INTO hashes VALUES (?, ?, ?)",
+                ((value, episode_id, i) for i, value in enumerate(fingerprint)),
+            )
+
+    def lookup(
+        self,
+        fingerprint: List[int],
+        exclude_id: str | None = None,
+        duration_seconds: float | None = None,
+    ) -> dict | None:
+        """
+        Finds an indexed episode with the same audio.
+
+        Parameters:
+            fingerprint (List[int]): Fingerprint of the new audio.
+            exclude_id (str | None, optional): Episode id to ignore (the episode itself).
+            duration_seconds (float | None, optional): Full duration of the new episode, from the feed or video metadata.
+
+        Returns:
+            dict | None: "episode_id", "transcript_path", "bit_error_rate" and "offset" of the best match, or None.
+        """
+        if not fingerprint:
+            return None
+
+        import numpy as np
+
+        # Every 4th frame is enough to find candidates
+        positions = {}
+        for i in range(0, len(fingerprint), 4):
+            positions.setdefault(fingerprint[i], []).append(i)
+
+        votes = Counter()
+        values = list(positions)
+        with closing(self._connect()) as conn:
+            for start in range(0, len(values), 500):
+                batch = values[start : start + 500]
+                rows = conn.execute(
+                    "SELECT value, episode_id, position FROM hashes WHERE value IN "
+                    f"({','.join('?' * len(batch))})",
+                    batch,
+                ).fetchall()
+                for value, episode_id, position in rows:
+                    if episode_id == exclude_id:
+                        continue
+                    for i in positions[value]:
+                        votes[(episode_id, position - i)] += 1
+
+            for (episode_id, offset), count in votes.most_common(3):
+                if count < self.min_votes:
+                    break
+
+                row = conn.execute(
+                    "SELECT transcript_path, fingerprint, duration_seconds "
+                    "FROM fingerprints WHERE episode_id = ?",
+                    (episode_id,),
+                ).fetchone()
+                if row is None:
+                    continue
+
+                transcript_path, blob, indexed_duration = row
+                # A positive offset is audio the indexed episode has before the new one starts
+                if (
+                    duration_seconds
+                    and indexed_duration
+                    and abs(
+                        indexed_duration
+                        - duration_seconds
+                        - offset / FRAMES_PER_SECOND
+                    )
+                    > self.max_duration_difference
+                ):
+                    continue
+
+                indexed = np.frombuffer(blob, dtype=np.uint32).tolist()
+                errors = frame_bit_errors(fingerprint, indexed, offset)
+                overlap = len(errors)
+                if overlap < min(self.min_overlap_frames, len(fingerprint)):
+                    continue
+
+                rate = float(errors.sum()) / (32 * overlap)
+                if rate <= self.max_bit_error_rate and self._matches_past_opening(errors):
+                    return {
+                        "episode_id": episode_id,
+                        "transcript_path": transcript_path,
+                        "bit_error_rate": rate,
+                        "offset": offset,
+                    }
+        return None
+
+    def _matches_past_opening(self, errors) -> bool:
+        """
+        Checks that the audio after the leading run of matching blocks matches too,
+        so a shared intro or pre-roll alone does not make two episodes match.
+        """
+        limit = 32 * self.max_bit_error_rate
+        lead = 0
+        while (
+            lead < len(errors)
+            and errors[lead : lead + self.block_frames].mean() <= limit
+        ):
+            lead += self.block_frames
+
+        rest = errors[lead:]
+        return len(rest) == 0 or rest.mean() <= limit
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=30)
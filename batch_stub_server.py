@@ -0,0 +1,173 @@
+"""
+A local stand-in for the OpenAI file and batch endpoints used by
+`batch_summarizer.py`, for trying bulk summarization without an API key.
+
+Batches complete on the first status request after `--delay` seconds. Each
+"summary" lists one bullet per `--- Chunk N ---` marker of the prompt, so the
+mapping of results back to episodes can be checked.
+
+    python batch_stub_server.py --port 8008
+    OPENAI_API_KEY=stub OPENAI_BASE_URL=http://127.0.0.1:8008/v1 python batch_summarizer.py ...
+"""
+
+import re
+import json
+import time
+import uuid
+import argparse
+
+from flask import Flask, Response, jsonify, request
+
+app = Flask(__name__)
+files = {}
+batches = {}
+delay_seconds = 0.0
+
+CHUNK_PATTERN = re.compile(r"--- Chunk (\d+) ---\n(.*?)(?=\n\n--- Chunk |\Z)", re.S)
+
+
+def _file_object(file_id: str) -> dict:
+    file = files[file_id]
+    return {
+        "id": file_id,
+        "object": "file",
+        "bytes": len(file["content"]),
+        "created_at": file["created_at"],
+        "filename": file["filename"],
+        "purpose": file["purpose"],
+        "status": "processed",
+    }
+
+
+def _store_file(content: bytes, filename: str, purpose: str) -> str:
+    file_id = f"file-{uuid.uuid4().hex}"
+    files[file_id] = {
+        "content": content,
+        "filename": filename,
+        "purpose": purpose,
+        "created_at": int(time.time()),
+    }
+    return file_id
+
+
+def _complete(body: dict) -> dict:
+    prompt = body["messages"][-1]["content"]
+    bullets = [
+        f"- **Chunk {number}**: {' '.join(text.split()[:12])}"
+        for number, text in CHUNK_PATTERN.findall(prompt)
+    ]
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model"),
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": "\n".join(bullets)},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+    }
+
+
+def _run_batch(batch: dict):
+    """Answers every request of a batch and stores the output file."""
+    lines = files[batch["input_file_id"]]["content"].decode("utf-8").splitlines()
+    output = []
+    for line in filter(None, lines):
+        item = json.loads(line)
+        output.append(
+            {
+                "id": f"batch_req_{uuid.uuid4().hex}",
+                "custom_id": item["custom_id"],
+                "response": {
+                    "status_code": 200,
+                    "request_id": uuid.uuid4().hex,
+                    "body": _complete(item["body"]),
+                },
+                "error": None,
+            }
+        )
+
+    content = "".join(json.dumps(o) + "\n" for o in output).encode("utf-8")
+    batch["output_file_id"] = _store_file(content, "output.jsonl", "batch_output")
+    batch["status"] = "completed"
+    batch["completed_at"] = int(time.time())
+    batch["request_counts"] = {
+        "total": len(output),
+        "completed": len(output),
+        "failed": 0,
+    }
+
+
+@app.route("/v1/files", methods=["POST"])
+def create_file():
+    upload = request.files["file"]
+    file_id = _store_file(upload.read(), upload.filename, request.form["purpose"])
+    return jsonify(_file_object(file_id))
+
+
+@app.route("/v1/files/<file_id>", methods=["GET"])
+def retrieve_file(file_id):
+    if file_id not in files:
+        return jsonify({"error": {"message": "No such file"}}), 404
+    return jsonify(_file_object(file_id))
+
+
+@app.route("/v1/files/<file_id>/content", methods=["GET"])
+def file_content(file_id):
+    if file_id not in files:
+        return jsonify({"error": {"message": "No such file"}}), 404
+    return Response(files[file_id]["content"], mimetype="application/jsonl")
+
+
+@app.route("/v1/batches", methods=["POST"])
+def create_batch():
+    data = request.get_json()
+    if data.get("input_file_id") not in files:
+        return jsonify({"error": {"message": "No such file"}}), 400
+
+    batch_id = f"batch_{uuid.uuid4().hex}"
+    batches[batch_id] = {
+        "id": batch_id,
+        "object": "batch",
+        "endpoint": data["endpoint"],
+        "input_file_id": data["input_file_id"],
+        "completion_window": data["completion_window"],
+        "status": "in_progress",
+        "output_file_id": None,
+        "error_file_id": None,
+        "created_at": int(time.time()),
+        "completed_at": None,
+        "request_counts": {"total": 0, "completed": 0, "failed": 0},
+        "metadata": data.get("metadata"),
+    }
+    return jsonify(batches[batch_id])
+
+
+@app.route("/v1/batches/<batch_id>", methods=["GET"])
+def retrieve_batch(batch_id):
+    batch = batches.get(batch_id)
+    if batch is None:
+        return jsonify({"error": {"message": "No such batch"}}), 404
+
+    if batch["status"] == "in_progress" and time.time() - batch["created_at"] >= delay_seconds:
+        _run_batch(batch)
+    return jsonify(batch)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for the OpenAI Batch API.")
+    parser.add_argument("--port", type=int, default=8008)
+    parser.add_argument(
+        "--delay",
+        type=float,
+        default=0.0,
+        help="Seconds before a batch is reported as completed.",
+    )
+    args = parser.parse_args()
+
+    delay_seconds = args.delay
+    app.run(port=args.port)
@@ -0,0 +1,317 @@
+import os
+import io
+import json
+import time
+import logging
+import argparse
+
+from typing import Dict, List, Optional
+from openai_summarizer import OpenAI_Summarizer
+from utils.checkpoint_utils import read_checkpoint, write_checkpoint
+
+logger = logging.getLogger(__name__)
+
+
+class OpenAI_Batch_Summarizer:
+    """
+    Summarizes many transcripts at once through the OpenAI Batch API.
+
+    The prompts are built exactly as `OpenAI_Summarizer.summarize` builds them,
+    written to a JSONL batch file and submitted as one batch, which is not
+    subject to the per-minute rate limits of interactive requests and is billed
+    at a discount. Results arrive within the `completion_window` (up to 24h),
+    so this is meant for back-catalogue processing, not for interactive use.
+
+    Every submitted batch is recorded in `batch_dir`, so its results can be
+    collected by a later process. Collected summaries are stored as summary
+    checkpoints, where the interactive pipeline picks them up.
+    """
+
+    ENDPOINT = "/v1/chat/completions"
+    FINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+    def __init__(self, summarizer: OpenAI_Summarizer, config: dict):
+        """
+        Parameters:
+            summarizer (OpenAI_Summarizer): Builds the prompts and provides the client.
+            config (dict): The "batch" section of the summarizer configuration.
+        """
+        self.summarizer = summarizer
+        self.config = config
+        self.batch_dir = config.get("batch_dir", os.path.join("downloads", "_batches"))
+        self.completion_window = config.get("completion_window", "24h")
+        self.poll_interval = config.get("poll_interval", 60)
+        self.max_requests_per_batch = config.get("max_requests_per_batch", 50000)
+
+    @property
+    def client(self):
+        return self.summarizer.client
+
+    def summarize_all(
+        self,
+        episodes: List[dict],
+        detail: float = 0,
+        minimum_chunk_size: Optional[int] = 500,
+        chunk_delimiter: str = ".",
+    ) -> Dict[str, str]:
+        """
+        Summarizes episodes through one or more batches and waits for the results.
+
+        Parameters:
+            episodes (List[dict]): Episodes with an "id", the transcript "text" and optionally a "show_id".
+            detail (float, optional): Level of detail, as in `OpenAI_Summarizer.summarize`. Defaults to 0.
+            minimum_chunk_size (Optional[int], optional): Minimum chunk size in tokens. Defaults to 500.
+            chunk_delimiter (str, optional): Delimiter used to split the text into chunks. Defaults to ".".
+
+        Returns:
+            Dict[str, str]: Summaries by episode id. Episodes whose request failed are missing.
+        """
+        summaries, batch_ids = {}, []
+        os.makedirs(self.batch_dir, exist_ok=True)
+
+        for start in range(0, len(episodes), self.max_requests_per_batch):
+            path = os.path.join(self.batch_dir, f"input_{int(time.time())}_{start}.jsonl")
+            requests, cached = self.write_batch_file(
+                episodes[start : start + self.max_requests_per_batch],
+                path,
+                detail,
+                minimum_chunk_size,
+                chunk_delimiter,
+            )
+            summaries.update(cached)
+            if requests:
+                batch_ids.append(self.submit(path, requests))
+            else:
+                os.remove(path)
+
+        for batch_id in batch_ids:
+            self.wait(batch_id)
+            summaries.update(self.collect(batch_id))
+        return summaries
+
+    def write_batch_file(
+        self,
+        episodes: List[dict],
+        path: str,
+        detail: float = 0,
+        minimum_chunk_size: Optional[int] = 500,
+        chunk_delimiter: str = ".",
+    ) -> tuple:
+        """
+        Writes the summarization prompts of episodes to a JSONL batch file.
+
+        Episodes that already have a summary checkpoint are not written.
+
+        Returns:
+            tuple: (requests (dict), cached (dict)) where requests maps the
+            custom id of every written line to its episode and checkpoint path,
+            and cached maps episode ids to summaries that already existed.
+        """
+        requests, cached = {}, {}
+        with open(path, "w", encoding="utf-8") as file:
+            for episode in episodes:
+                episode_id = episode["id"]
+                if episode_id in requests or episode_id in cached:
+                    continue
+
+                checkpoint_path = self.summarizer.checkpoint_path(
+                    episode["text"], detail, minimum_chunk_size, chunk_delimiter, episode_id
+                )
+                summary = read_checkpoint(checkpoint_path) if checkpoint_path else None
+                if summary is not None:
+                    cached[episode_id] = summary
+                    continue
+
+                messages, _ = self.summarizer.build_messages(
+                    episode["text"],
+                    detail,
+                    minimum_chunk_size,
+                    chunk_delimiter,
+                    episode_id,
+                    episode.get("show_id"),
+                )
+                line = {
+                    "custom_id": episode_id,
+                    "method": "POST",
+                    "url": self.ENDPOINT,
+                    "body": {
+                        "model": self.summarizer.model,
+                        "messages": messages,
+                        "temperature": 0,
+                    },
+                }
+                file.write(json.dumps(line) + "\n")
+                requests[episode_id] = {
+                    "episode_id": episode_id,
+                    "checkpoint_path": checkpoint_path,
+                }
+
+        logger.info(
+            f"Wrote {len(requests)} requests to {path}, {len(cached)} summaries already existed"
+        )
+        return requests, cached
+
+    def submit(self, path: str, requests: dict) -> str:
+        """
+        Uploads a batch file and starts the batch.
+
+        Parameters:
+            path (str): Path of the JSONL batch file.
+            requests (dict): Requests written to the file, as returned by `write_batch_file`.
+
+        Returns:
+            str: The batch id.
+        """
+        with open(path, "rb") as file:
+            input_file = self.client.files.create(file=file, purpose="batch")
+
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=self.ENDPOINT,
+            completion_window=self.completion_window,
+        )
+        write_checkpoint(
+            self._state_path(batch.id),
+            json.dumps({"input_path": path, "requests": requests}),
+        )
+        logger.info(f"Submitted batch {batch.id} with {len(requests)} requests")
+        return batch.id
+
+    def wait(self, batch_id: str):
+        """
+        Polls a batch until it reaches a final status.
+
+        Returns:
+            Batch: The final state of the batch.
+        """
+        while True:
+            batch = self.client.batches.retrieve(batch_id)
+            if batch.status in self.FINAL_STATUSES:
+                logger.info(f"Batch {batch_id} is {batch.status}")
+                return batch
+
+            counts = batch.request_counts
+            if counts is not None:
+                logger.info(
+                    f"Batch {batch_id} is {batch.status}: "
+                    f"{counts.completed}/{counts.total} requests done"
+                )
+            time.sleep(self.poll_interval)
+
+    def collect(self, batch_id: str) -> Dict[str, str]:
+        """
+        Maps the results of a finished batch back to episodes.
+
+        Successful summaries are written to their checkpoints. Failed requests
+        are logged and left out, so they can be submitted again.
+
+        Returns:
+            Dict[str, str]: Summaries by episode id.
+        """
+        with open(self._state_path(batch_id), "r", encoding="utf-8") as file:
+            requests = json.load(file)["requests"]
+
+        batch = self.client.batches.retrieve(batch_id)
+        summaries = {}
+
+        for result in self._read_results(batch.output_file_id):
+            request = requests.get(result.get("custom_id"))
+            response = result.get("response") or {}
+            if request is None:
+                continue
+            if response.get("status_code") != 200:
+                logger.warning(
+                    f"Request for episode {request['episode_id']} failed: {response.get('body')}"
+                )
+                continue
+
+            summary = response["body"]["choices"][0]["message"]["content"]
+            summaries[request["episode_id"]] = summary
+            if request["checkpoint_path"]:
+                write_checkpoint(request["checkpoint_path"], summary)
+
+        for result in self._read_results(batch.error_file_id):
+            logger.warning(
+                f"Request {result.get('custom_id')} failed: {result.get('error')}"
+            )
+
+        logger.info(f"Collected {len(summaries)}/{len(requests)} summaries of batch {batch_id}")
+        return summaries
+
+    def _read_results(self, file_id: Optional[str]):
+        if not file_id:
+            return
+        content = self.client.files.content(file_id).text
+        for line in io.StringIO(content):
+            if line.strip():
+                yield json.loads(line)
+
+    def _state_path(self, batch_id: str) -> str:
+        return os.path.join(self.batch_dir, f"{batch_id}.json")
+
+
+def main():
+    from dotenv import load_dotenv
+
+    parser = argparse.ArgumentParser(
+        description="Summarizes transcripts in bulk through the OpenAI Batch API."
+    )
+    parser.add_argument(
+        "transcripts",
+        nargs="*",
+        help="Transcript files; the file name (without extension) is the episode id.",
+    )
+    parser.add_argument("--detail", type=float, default=0.0, help="Level of detail (0-1).")
+    parser.add_argument("--show-id", help="Show the transcripts belong to.")
+    parser.add_argument(
+        "--collect",
+        metavar="BATCH_ID",
+        help="Collect the results of a previously submitted batch instead.",
+    )
+    parser.add_argument(
+        "--output-dir",
+        default="summaries",
+        help="Directory the summaries are written to. Defaults to ./summaries.",
+    )
+    args = parser.parse_args()
+
+    load_dotenv(override=True)
+    with open("config.json") as f:
+        config = json.load(f)
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(message)s",
+        datefmt="%d-%m-%Y %H:%M:%S",
+    )
+
+    batch_summarizer = OpenAI_Batch_Summarizer(
+        OpenAI_Summarizer(config=config["openai"]),
+        config["openai"].get("batch", {}),
+    )
+
+    if args.collect:
+        batch_summarizer.wait(args.collect)
+        summaries = batch_summarizer.collect(args.collect)
+    else:
+        episodes = []
+        for path in args.transcripts:
+            with open(path, "r", encoding="utf-8") as file:
+                episodes.append(
+                    {
+                        "id": os.path.splitext(os.path.basename(path))[0],
+                        "text": file.read(),
+                        "show_id": args.show_id,
+                    }
+                )
+        summaries = batch_summarizer.summarize_all(episodes, detail=args.detail)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    for episode_id, summary in summaries.items():
+        with open(os.path.join(args.output_dir, f"{episode_id}.md"), "w", encoding="utf-8") as file:
+            file.write(summary)
+    logger.info(f"Wrote {len(summaries)} summaries to {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,40 @@
-from typing import Tuple
+from typing import Callable, Optional, Tuple
 
 
 class Downloader:
     def download_episode(
-        self, source_url: str, episode_name: str | None
-    ) -> Tuple[str, str, str]:
+        self,
+        source_url: str,
+        episode_name: str | None,
+        on_prefix: Optional[Callable[[str, dict], bool]] = None,
+    ) -> Tuple[str | None, dict]:
+        """
+        Downloads an episode and returns `(file_path, metadata)`.
+
+        The metadata contains at least "id" and "title", and optionally
+        "thumbnail", "channel", "duration_string", "duration" (seconds) and
+        "release_date".
+
+        Downloaders that stream the audio call `on_prefix` with the partial file
+        and the episode metadata once its beginning is available; if it returns True the download stops
+        and `(None, metadata)` is returned.
+        """
         pass
+
+    def fetch_transcript(
+        self, source_url: str, episode_name: str | None
+    ) -> Tuple[str | None, dict]:
+        """
+        Returns `(transcript_text, metadata)` for an episode whose publisher or
+        platform already provides a transcript, or `(None, {})` otherwise.
+        """
+        return None, {}
+
+    def probe_episode(self, source_url: str, episode_name: str | None) -> dict:
+        """
+        Cheaply looks up the size of an episode without downloading it.
+
+        Returns:
+            dict: "duration_seconds" and "size_bytes", either of which may be None if unknown.
+        """
+        return {"duration_seconds": None, "size_bytes": None}
@@ -0,0 +1,243 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import logging
+
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    stage TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_by_status ON jobs (status, created_at);
+"""
+
+
+class SQLite_Job_Queue:
+    """
+    A durable job queue shared by API and worker processes through a SQLite file.
+
+    The database runs in WAL mode, which needs all processes on one host:
+    keep `db_path` on a local disk, not on a network filesystem.
+
+    Workers claim jobs with a lease that they renew while working. If a worker
+    crashes, its lease expires and the job is handed to another worker, up to
+    `max_attempts` claims in total.
+
+    Job statuses are "queued", "running", "done" and "failed".
+
+    Attributes:
+        db_path (str): Path of the SQLite database, on a local disk.
+        max_attempts (int): Number of claims after which a job is marked as failed.
+    """
+
+    def __init__(self, db_path: str, max_attempts: int = 3):
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    def enqueue(self, payload: dict) -> str:
+        """
+        Adds a job to the queue.
+
+        Parameters:
+            payload (dict): JSON-serializable job input.
+
+        Returns:
+            str: The job id.
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, payload, status, created_at, updated_at) "
+                "VALUES (?, ?, 'queued', ?, ?)",
+                (job_id, json.dumps(payload), now, now),
+            )
+        return job_id
+
+    def claim(self, worker_id: str, lease_seconds: float) -> dict | None:
+        """
+        Claims the next queued job, or a running job whose lease has expired.
+
+        Interactive jobs are claimed before bulk jobs. Within a priority class
+        the job of the tenant with the fewest running jobs goes first, then the oldest.
+
+        Parameters:
+            worker_id (str): Unique identifier of the claiming worker.
+            lease_seconds (float): How long the claim is valid unless renewed.
+
+        Returns:
+            dict | None: The job ("id", "payload", "attempts"), or None if there is no work.
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            # Jobs whose worker died too many times are given up on
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = 'Lease expired too many times', "
+                "updated_at = ? WHERE status = 'running' AND lease_expires < ? "
+                "AND attempts >= ?",
+                (now, now, self.max_attempts),
+            )
+            # Interactive jobs go first; within a class, the tenant with the
+            # fewest running jobs, so one tenant's backlog cannot take every worker
+            row = conn.execute(
+                "SELECT id, payload, attempts FROM jobs AS j "
+                "WHERE status = 'queued' OR (status = 'running' AND lease_expires < ?) "
+                "ORDER BY CASE json_extract(payload, '$.priority') "
+                "WHEN 'bulk' THEN 1 ELSE 0 END, "
+                "(SELECT COUNT(*) FROM jobs AS r WHERE r.status = 'running' "
+                "AND r.lease_expires >= ? AND json_extract(r.payload, '$.tenant') "
+                "IS json_extract(j.payload, '$.tenant')), "
+                "created_at LIMIT 1",
+                (now, now),
+            ).fetchone()
+            if row is None:
+                return None
+
+            job_id, payload, attempts = row
+            conn.execute(
+                "UPDATE jobs SET status = 'running', lease_owner = ?, lease_expires = ?, "
+                "attempts = ?, updated_at = ? WHERE id = ?",
+                (worker_id, now + lease_seconds, attempts + 1, now, job_id),
+            )
+
+        if attempts:
+            logger.info(f"Reclaimed job {job_id} (attempt {attempts + 1})")
+        return {"id": job_id, "payload": json.loads(payload), "attempts": attempts + 1}
+
+    def heartbeat(
+        self,
+        job_id: str,
+        worker_id: str,
+        lease_seconds: float,
+        stage: str | None = None,
+    ) -> bool:
+        """
+        Renews a lease, optionally recording the stage the job is in.
+
+        Returns:
+            bool: False if the worker no longer holds the lease.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET lease_expires = ?, stage = COALESCE(?, stage), "
+                "updated_at = ? WHERE id = ? AND lease_owner = ? AND status = 'running'",
+                (now + lease_seconds, stage, now, job_id, worker_id),
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, job_id: str, worker_id: str, result: dict) -> bool:
+        """
+        Stores the result of a job held by `worker_id`.
+
+        Returns:
+            bool: False if the lease was lost and the result was discarded.
+        """
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'done', result = ?, error = NULL, "
+                "lease_owner = NULL, lease_expires = NULL, updated_at = ? "
+                "WHERE id = ? AND lease_owner = ? AND status = 'running'",
+                (json.dumps(result), time.time(), job_id, worker_id),
+            )
+        return cursor.rowcount == 1
+
+    def fail(self, job_id: str, worker_id: str, error: str, retry: bool = True) -> bool:
+        """
+        Releases a job after an error, requeueing it while attempts remain.
+
+        Returns:
+            bool: False if the lease was lost.
+        """
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = CASE WHEN ? AND attempts < ? "
+                "THEN 'queued' ELSE 'failed' END, error = ?, lease_owner = NULL, "
+                "lease_expires = NULL, updated_at = ? "
+                "WHERE id = ? AND lease_owner = ? AND status = 'running'",
+                (retry, self.max_attempts, error, time.time(), job_id, worker_id),
+            )
+        return cursor.rowcount == 1
+
+    def get(self, job_id: str) -> dict | None:
+        """
+        Returns the public state of a job.
+
+        Returns:
+            dict | None: "id", "status", "stage", "attempts", "result" and "error", or None if unknown.
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT id, status, stage, attempts, result, error FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+
+        job_id, status, stage, attempts, result, error = row
+        return {
+            "id": job_id,
+            "status": status,
+            "stage": stage,
+            "attempts": attempts,
+            "result": json.loads(result) if result else None,
+            "error": error,
+        }
+
+    def pending_asr_seconds(self) -> float:
+        """
+        Returns the estimated ASR seconds of all queued and running jobs, read
+        from the "estimate" stored in their payloads by the admission controller.
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT COALESCE(SUM(json_extract(payload, '$.estimate.asr_seconds')), 0) "
+                "FROM jobs WHERE status IN ('queued', 'running')"
+            ).fetchone()
+        return row[0]
+
+    def _connect(self):
+        # A connection per operation keeps the queue safe to share between threads
+        return _closing_connection(
+            sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        )
+
+    @contextmanager
+    def _transaction(self):
+        with self._connect() as conn:
+            # Take the write lock up front so two workers cannot claim the same job
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+
+@contextmanager
+def _closing_connection(conn: sqlite3.Connection):
+    try:
+        yield conn
+    finally:
+        conn.close()
@@ -1,11 +1,15 @@
+import os
+import math
 import logging
-import streamlit as st
 
-from openai import OpenAI
-from typing import Optional
+from typing import Callable, ContextManager, List, Optional, Tuple
 from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor
+from segment_deduplicator import Segment_Deduplicator
+from utils.checkpoint_utils import checkpoint_key, read_checkpoint, write_checkpoint
 from utils.openai_utils import (
     chunk_on_delimiter,
+    create_openai_client,
     get_chat_completion,
     num_tokens_from_text,
 )
@@ -45,19 +49,50 @@ class OpenAI_Summarizer:
         Now, think step by step, review all labeled chunks, and output the bullet-point summaries exactly as specified in the instructions.
         """
 
+    CHUNK_SYSTEM_PROMPT = """
+        # Role and Objective
+        You are a seasoned podcast transcript summarization expert. You receive one consecutive part of a longer podcast transcript, while the rest of it is still being transcribed.
+
+        # Instructions
+        1. Write **three to five** concise bullet points capturing the key insights, tone, and notable quotes of this part.
+        2. Summarize only this part: do not add an introduction or conclusion, and do not guess what comes before or after.
+        3. Format your response in Markdown, using `- ` for bullets and inline code (``) for any quoted text.
+        """
+
     def __init__(self, config: dict):
         """
         Initializes the OpenAI Summarizer.
 
         Parameters:
-        - config (dict): Configuration dictionary containing settings, including whether debugging is enabled.
+        - config (dict): Configuration dictionary containing settings, including whether debugging and checkpointing are enabled.
         """
-        # self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY")) # If you do not run on Streamlit
-        self.client = OpenAI(
-            api_key=st.secrets.get("OPENAI_API_KEY", "")
-        )  # If you run on Streamlit
         self.config = config
         self.debug = self.config.get("debug", False)
+        self.checkpoint = self.config.get("checkpoint", True)
+        self._client = None
+
+        dedup_config = self.config.get("dedup", {})
+        self.deduplicator = (
+            Segment_Deduplicator(dedup_config)
+            if dedup_config.get("enabled", False)
+            else None
+        )
+
+        stream_config = self.config.get("stream", {})
+        self.streaming = stream_config.get("enabled", False)
+        self.stream_chunk_tokens = stream_config.get("chunk_tokens", 2000)
+        self.stream_max_workers = stream_config.get("max_workers", 2)
+
+    @property
+    def client(self):
+        """The OpenAI client, created on first use."""
+        if self._client is None:
+            self._client = create_openai_client(self.config.get("base_url"))
+        return self._client
+
+    @property
+    def model(self) -> str:
+        return self.config.get("model", "gpt-3.5-turbo")
 
     def summarize(
         self,
@@ -65,6 +100,10 @@ class OpenAI_Summarizer:
         detail: float = 0,
         minimum_chunk_size: Optional[int] = 500,
         chunk_delimiter: str = ".",
+        progress: Optional[Callable[[float, float], None]] = None,
+        checkpoint_id: Optional[str] = None,
+        show_id: Optional[str] = None,
+        llm_slot: Optional[Callable[[float], ContextManager]] = None,
     ):
         """
         Summarizes a given text by splitting it into chunks and summarizing each individually.
@@ -74,6 +113,10 @@ class OpenAI_Summarizer:
         - detail (float, optional): Value between 0 and 1 indicating the level of detail (0 = highly summarized, 1 = detailed). Defaults to 0.
         - minimum_chunk_size (Optional[int], optional): Minimum chunk size for splitting text. Defaults to 500 tokens.
         - chunk_delimiter (str, optional): Delimiter used to split the text into chunks. Defaults to ".".
+        - progress (Callable, optional): Called as `progress(done, total)` once the chunks are prepared and once the summary is ready.
+        - checkpoint_id (Optional[str], optional): Episode identifier under which the finished summary is stored, so a retry does not call the API again.
+        - show_id (Optional[str], optional): Identifier of the show, used to detect boilerplate repeated across its episodes.
+        - llm_slot (Callable, optional): Called as `llm_slot(tokens)` around every API request; returns a context manager that waits for a scheduler slot (see `scheduler.Fair_Scheduler.slot`).
 
         Returns:
         - str: The final compiled summary of the text.
@@ -81,6 +124,63 @@ class OpenAI_Summarizer:
         # Ensure detail value is within valid range
         assert 0 <= detail <= 1
 
+        checkpoint_path = self.checkpoint_path(
+            text, detail, minimum_chunk_size, chunk_delimiter, checkpoint_id
+        )
+        if checkpoint_path:
+            summary = read_checkpoint(checkpoint_path)
+            if summary is not None:
+                logger.info("Summary already exists.")
+                if progress:
+                    progress(1, 1)
+                return summary
+
+        messages, num_chunks = self.build_messages(
+            text, detail, minimum_chunk_size, chunk_delimiter, checkpoint_id, show_id
+        )
+
+        if progress:
+            progress(0, num_chunks)
+
+        summary = self._complete(messages, llm_slot)
+
+        if checkpoint_path:
+            write_checkpoint(checkpoint_path, summary)
+
+        if progress:
+            progress(num_chunks, num_chunks)
+
+        return summary
+
+    def build_messages(
+        self,
+        text: str,
+        detail: float = 0,
+        minimum_chunk_size: Optional[int] = 500,
+        chunk_delimiter: str = ".",
+        checkpoint_id: Optional[str] = None,
+        show_id: Optional[str] = None,
+    ) -> Tuple[List[dict], int]:
+        """
+        Builds the chat messages that `summarize` sends for a text.
+
+        Parameters:
+        - text (str): The text to be summarized.
+        - detail (float, optional): Value between 0 and 1 indicating the level of detail. Defaults to 0.
+        - minimum_chunk_size (Optional[int], optional): Minimum chunk size for splitting text. Defaults to 500 tokens.
+        - chunk_delimiter (str, optional): Delimiter used to split the text into chunks. Defaults to ".".
+        - checkpoint_id (Optional[str], optional): Episode identifier, used to record the episode in the show's deduplication index.
+        - show_id (Optional[str], optional): Identifier of the show, used to detect boilerplate repeated across its episodes.
+
+        Returns:
+        - Tuple[List[dict], int]: The messages and the number of labeled chunks.
+        """
+        # Drop repeated segments before they are tokenized and sent to the model
+        if self.deduplicator is not None:
+            text, _ = self.deduplicator.deduplicate(
+                text, chunk_delimiter, show_id=show_id, episode_id=checkpoint_id
+            )
+
         # Determine number of chunks dynamically based on the desired detail level
         min_chunks = 1
         max_chunks = len(
@@ -116,7 +216,298 @@ class OpenAI_Summarizer:
             {"role": "system", "content": self.DEFAULT_SYSTEM_PROMPT},
             {"role": "user", "content": f"{query}"},
         ]
+        return messages, len(text_chunks)
+
+    def checkpoint_path(
+        self,
+        text: str,
+        detail: float = 0,
+        minimum_chunk_size: Optional[int] = 500,
+        chunk_delimiter: str = ".",
+        checkpoint_id: Optional[str] = None,
+    ) -> Optional[str]:
+        """
+        Returns where the summary of `text` is checkpointed, or None if checkpointing is off.
+        """
+        return self._summary_file(
+            checkpoint_id,
+            checkpoint_key(
+                self.model,
+                self.DEFAULT_SYSTEM_PROMPT,
+                detail,
+                minimum_chunk_size,
+                chunk_delimiter,
+                text,
+            ),
+        )
+
+    def start_stream(
+        self,
+        detail: float = 0,
+        chunk_delimiter: str = ".",
+        checkpoint_id: Optional[str] = None,
+        show_id: Optional[str] = None,
+        llm_slot: Optional[Callable[[float], ContextManager]] = None,
+    ) -> "Streaming_Summary":
+        """
+        Starts a summary of a transcript that is still being produced.
+
+        Parameters:
+        - detail (float, optional): Value between 0 and 1 indicating the level of detail. Defaults to 0.
+        - chunk_delimiter (str, optional): Delimiter at which the text is split into chunks. Defaults to ".".
+        - checkpoint_id (Optional[str], optional): Episode identifier under which chunk summaries and the final summary are stored; the final summary shares the checkpoint of `summarize`.
+        - show_id (Optional[str], optional): Identifier of the show, used to detect boilerplate repeated across its episodes.
+        - llm_slot (Callable, optional): Called as `llm_slot(tokens)` around every API request; returns a context manager that waits for a scheduler slot (see `scheduler.Fair_Scheduler.slot`).
+
+        Returns:
+        - Streaming_Summary: Takes the transcript piece by piece through `add`; `finish` returns the summary.
+        """
+        assert 0 <= detail <= 1
+        return Streaming_Summary(
+            self, detail, chunk_delimiter, checkpoint_id, show_id, llm_slot
+        )
+
+    def summarize_chunk(
+        self,
+        chunk: str,
+        checkpoint_id: Optional[str] = None,
+        llm_slot: Optional[Callable[[float], ContextManager]] = None,
+    ) -> str:
+        """
+        Summarizes one chunk of a streamed transcript.
+
+        Parameters:
+        - chunk (str): The chunk of text.
+        - checkpoint_id (Optional[str], optional): Episode identifier under which the chunk summary is stored.
+        - llm_slot (Callable, optional): Called as `llm_slot(tokens)` around every API request; returns a context manager that waits for a scheduler slot (see `scheduler.Fair_Scheduler.slot`).
+
+        Returns:
+        - str: Bullet points summarizing the chunk.
+        """
+        path = self._summary_file(
+            checkpoint_id,
+            checkpoint_key(self.model, self.CHUNK_SYSTEM_PROMPT, chunk),
+            "chunks",
+        )
+        if path:
+            summary = read_checkpoint(path)
+            if summary is not None:
+                return summary
+
+        messages = [
+            {"role": "system", "content": self.CHUNK_SYSTEM_PROMPT},
+            {"role": "user", "content": chunk.strip()},
+        ]
+        summary = self._complete(messages, llm_slot)
+
+        if path:
+            write_checkpoint(path, summary)
+        return summary
 
-        return get_chat_completion(
-            self.client, messages, self.config.get("model", "gpt-3.5-turbo")
+    def merge_chunk_summaries(
+        self,
+        chunk_summaries: List[str],
+        detail: float,
+        llm_slot: Optional[Callable[[float], ContextManager]] = None,
+    ) -> str:
+        """
+        Merges the chunk summaries of a streamed transcript into the final summary.
+
+        Consecutive chunk summaries are grouped into `1 + detail * (n - 1)`
+        labeled chunks, so the detail level sets the length of the summary as in `summarize`.
+
+        Parameters:
+        - chunk_summaries (List[str]): Summaries of the chunks, in order.
+        - detail (float): Value between 0 and 1 indicating the level of detail.
+        - llm_slot (Callable, optional): Called as `llm_slot(tokens)` around every API request; returns a context manager that waits for a scheduler slot (see `scheduler.Fair_Scheduler.slot`).
+
+        Returns:
+        - str: The final compiled summary.
+        """
+        if not chunk_summaries:
+            return ""
+
+        num_groups = int(1 + detail * (len(chunk_summaries) - 1))
+        group_size = math.ceil(len(chunk_summaries) / num_groups)
+        labeled = []
+        for idx, start in enumerate(
+            range(0, len(chunk_summaries), group_size), start=1
+        ):
+            group = "\n".join(chunk_summaries[start : start + group_size])
+            labeled.append(f"--- Chunk {idx} ---\n{group.strip()}")
+
+        messages = [
+            {"role": "system", "content": self.DEFAULT_SYSTEM_PROMPT},
+            {"role": "user", "content": "\n\n".join(labeled)},
+        ]
+        return self._complete(messages, llm_slot)
+
+    def _complete(
+        self,
+        messages: List[dict],
+        llm_slot: Optional[Callable[[float], ContextManager]] = None,
+    ) -> str:
+        if llm_slot is None:
+            return get_chat_completion(self.client, messages, self.model)
+
+        tokens = sum(num_tokens_from_text(message["content"]) for message in messages)
+        with llm_slot(tokens):
+            return get_chat_completion(self.client, messages, self.model)
+
+    def _summary_file(
+        self, checkpoint_id: Optional[str], key: str, *subdirs: str
+    ) -> Optional[str]:
+        if not (self.checkpoint and checkpoint_id):
+            return None
+
+        return os.path.join(
+            os.getcwd(),
+            self.config.get("downloads_dir", "downloads"),
+            checkpoint_id,
+            "summaries",
+            *subdirs,
+            f"{key}.md",
+        )
+
+
+class Streaming_Summary:
+    """
+    A summary built while the transcript is still being produced.
+
+    Text is added as the ASR backend emits it. As soon as `chunk_tokens` of
+    complete sentences have accumulated, the chunk is summarized in the
+    background, so the LLM works while ASR is running. `finish` summarizes the
+    remainder and merges the chunk summaries with one short call, so the
+    end-to-end time is close to the longer of the two phases rather than their sum.
+
+    A chunk ends at the first delimiter at which it reaches `chunk_tokens`, so
+    the chunks (and their checkpoints) depend only on the text, not on how it
+    was split into segments. The final summary is stored under the same
+    checkpoint as `OpenAI_Summarizer.summarize`.
+    """
+
+    def __init__(
+        self,
+        summarizer: OpenAI_Summarizer,
+        detail: float,
+        chunk_delimiter: str,
+        checkpoint_id: Optional[str],
+        show_id: Optional[str],
+        llm_slot: Optional[Callable[[float], ContextManager]] = None,
+    ):
+        self.summarizer = summarizer
+        self.detail = detail
+        self.chunk_delimiter = chunk_delimiter
+        self.checkpoint_id = checkpoint_id
+        self.llm_slot = llm_slot
+        self.chunk_tokens = summarizer.stream_chunk_tokens
+
+        self._parts = []
+        self._buffer = ""
+        # Length and tokens of the complete sentences at the start of the buffer
+        self._scanned = 0
+        self._scanned_tokens = 0
+        self._futures = []
+        # Each stream has its own threads, so chunks of different runs wait
+        # for `llm_slot` side by side and the scheduler decides their order
+        self._executor = ThreadPoolExecutor(
+            max_workers=summarizer.stream_max_workers,
+            thread_name_prefix="chunk-summary",
+        )
+        self._dedup = (
+            summarizer.deduplicator.start(show_id, checkpoint_id)
+            if summarizer.deduplicator is not None
+            else None
+        )
+
+    @property
+    def started(self) -> bool:
+        """Whether any text was added."""
+        return bool(self._parts)
+
+    def add(self, text: str):
+        """Adds the next piece of the transcript; used as the `on_segment` callback of the transcriber."""
+        self._parts.append(text)
+        self._buffer += text
+
+        while True:
+            end = self._buffer.find(self.chunk_delimiter, self._scanned)
+            if end < 0:
+                return
+
+            end += len(self.chunk_delimiter)
+            self._scanned_tokens += num_tokens_from_text(self._buffer[self._scanned : end])
+            self._scanned = end
+            if self._scanned_tokens >= self.chunk_tokens:
+                ready, self._buffer = self._buffer[:end], self._buffer[end:]
+                self._scanned, self._scanned_tokens = 0, 0
+                self._submit(ready)
+
+    def finish(self, progress: Optional[Callable[[float, float], None]] = None) -> str:
+        """
+        Summarizes the remaining text and merges all chunk summaries.
+
+        Parameters:
+        - progress (Callable, optional): Called as `progress(done, total)` as chunk summaries complete and once the summary is ready.
+
+        Returns:
+        - str: The final compiled summary.
+        """
+        checkpoint_path = self.summarizer.checkpoint_path(
+            "".join(self._parts),
+            self.detail,
+            chunk_delimiter=self.chunk_delimiter,
+            checkpoint_id=self.checkpoint_id,
+        )
+        if checkpoint_path:
+            summary = read_checkpoint(checkpoint_path)
+            if summary is not None:
+                logger.info("Summary already exists.")
+                self.cancel()
+                if progress:
+                    progress(1, 1)
+                return summary
+
+        self._submit(self._buffer)
+        self._buffer, self._scanned, self._scanned_tokens = "", 0, 0
+        if self._dedup is not None:
+            self._dedup.close()
+
+        total = len(self._futures) + 1
+        chunk_summaries = []
+        try:
+            for future in self._futures:
+                chunk_summaries.append(future.result())
+                if progress:
+                    progress(len(chunk_summaries), total)
+        finally:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+        summary = self.summarizer.merge_chunk_summaries(
+            chunk_summaries, self.detail, self.llm_slot
+        )
+        if checkpoint_path:
+            write_checkpoint(checkpoint_path, summary)
+
+        if progress:
+            progress(total, total)
+        return summary
+
+    def cancel(self):
+        """Drops chunk summaries that have not started, e.g. when transcription failed."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, text: str):
+        if self._dedup is not None:
+            text = self._dedup.filter(text, self.chunk_delimiter)
+        if not text.strip():
+            return
+
+        self._futures.append(
+            self._executor.submit(
+                self.summarizer.summarize_chunk,
+                text,
+                self.checkpoint_id,
+                self.llm_slot,
+            )
         )
@@ -0,0 +1,303 @@
+import os
+import time
+import logging
+import threading
+
+from typing import Callable, Optional
+from downloader import Downloader
+from concurrent.futures import ThreadPoolExecutor
+from openai_summarizer import OpenAI_Summarizer
+from whisper_transcriber import Whisper_Transcriber
+from scheduler import Pipeline_Scheduler
+from utils.profiling_utils import NULL_PROFILER, Request_Profiler
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("download", "transcribe", "summarize")
+
+# Bytes per minute of a 128 kbps MP3, used to estimate the ASR cost of a file
+BYTES_PER_AUDIO_MINUTE = 960000
+
+
+def run_pipeline(
+    downloader: Downloader,
+    transcriber: Whisper_Transcriber,
+    summarizer: OpenAI_Summarizer,
+    source_url: str,
+    episode_name: str | None,
+    detail_level: float = 0.0,
+    progress: Optional[Callable[[str, float, float], None]] = None,
+    profiler: Optional[Request_Profiler] = None,
+    scheduler: Optional[Pipeline_Scheduler] = None,
+    priority: str = "interactive",
+    tenant: str = "default",
+) -> dict:
+    """
+    Downloads, transcribes and summarizes a single episode.
+
+    Parameters:
+        downloader (Downloader): The downloader instance (YouTube or RSS-based).
+        transcriber (Whisper_Transcriber): The transcriber instance for converting audio to text.
+        summarizer (OpenAI_Summarizer): The summarizer instance for generating summaries.
+        source_url (str): The URL of the podcast episode or RSS feed.
+        episode_name (str | None): The name of the episode (applicable for RSS feeds only).
+        detail_level (float, optional): Level of detail of the summary, between 0 and 1.
+        progress (Callable, optional): Called as `progress(stage, done, total)` when a stage or one of its chunks completes.
+        profiler (Request_Profiler, optional): Profiler to run the pipeline under, see `utils.profiling_utils.get_profiler`.
+        scheduler (Pipeline_Scheduler, optional): Schedules transcription and summarization requests against other runs.
+        priority (str, optional): Priority class of the run, "interactive" or "bulk". Defaults to "interactive".
+        tenant (str, optional): Tenant the work is accounted to for fair queuing. Defaults to "default".
+
+    Returns:
+        dict: The episode metadata together with the "summary".
+    """
+    if progress is None:
+        progress = _no_progress
+    if profiler is None:
+        profiler = NULL_PROFILER
+    if scheduler is None:
+        scheduler = Pipeline_Scheduler({})
+
+    # The profiler is entered here so it runs on the thread doing the work
+    with profiler:
+        return _run_stages(
+            downloader,
+            transcriber,
+            summarizer,
+            source_url,
+            episode_name,
+            detail_level,
+            progress,
+            profiler,
+            scheduler,
+            priority,
+            tenant,
+        )
+
+
+def _run_stages(
+    downloader: Downloader,
+    transcriber: Whisper_Transcriber,
+    summarizer: OpenAI_Summarizer,
+    source_url: str,
+    episode_name: str | None,
+    detail_level: float,
+    progress: Callable[[str, float, float], None],
+    profiler: Request_Profiler,
+    scheduler: Pipeline_Scheduler,
+    priority: str,
+    tenant: str,
+) -> dict:
+    stream = None
+
+    def llm_slot(tokens: float):
+        return scheduler.llm.slot(priority, tenant, cost=tokens / 1000)
+
+    # 0) Use an existing publisher or platform transcript if there is one
+    progress("download", 0, 1)
+    with profiler.stage("fetch_transcript"):
+        text, metadata = downloader.fetch_transcript(source_url, episode_name)
+
+    if text:
+        logger.info(f"Using existing transcript for {metadata.get('title', '')}")
+        progress("download", 1, 1)
+        progress("transcribe", 1, 1)
+    else:
+        if not downloader.config.get("fallback_to_asr", True):
+            raise ValueError(
+                "No existing transcript is available and ASR fallback is disabled."
+            )
+
+        # 1) Download, stopping early if the audio's beginning is already known
+        prefix_match = {}
+
+        def on_prefix(partial_path: str, episode: dict) -> bool:
+            prefix_match["text"] = transcriber.find_existing_transcript(
+                partial_path, episode["id"], duration_seconds=episode.get("duration")
+            )
+            return prefix_match["text"] is not None
+
+        with profiler.stage("download"):
+            mp3_path, metadata = downloader.download_episode(
+                source_url,
+                episode_name,
+                on_prefix=on_prefix if transcriber.fingerprint_index else None,
+            )
+        logger.info(f"Downloaded {metadata.get('title', '')}")
+        progress("download", 1, 1)
+
+        # 2) Transcribe, summarizing finished chunks meanwhile if streaming is enabled
+        progress("transcribe", 0, 1)
+        if mp3_path is None:
+            text = prefix_match["text"]
+            progress("transcribe", 1, 1)
+        else:
+            if summarizer.streaming:
+                stream = summarizer.start_stream(
+                    detail=detail_level,
+                    checkpoint_id=metadata.get("id") or None,
+                    show_id=_show_id(metadata),
+                    llm_slot=llm_slot,
+                )
+
+            def asr_slot():
+                return scheduler.asr.slot(
+                    priority,
+                    tenant,
+                    cost=os.path.getsize(mp3_path) / BYTES_PER_AUDIO_MINUTE,
+                )
+
+            with profiler.stage("transcribe"):
+                try:
+                    # The slot is only taken if the transcript is neither checkpointed nor known
+                    text = transcriber.transcribe(
+                        audio_path=mp3_path,
+                        video_id=metadata.get("id", ""),
+                        progress=lambda done, total: progress("transcribe", done, total),
+                        on_segment=stream.add if stream is not None else None,
+                        duration_seconds=metadata.get("duration"),
+                        asr_slot=asr_slot,
+                    )
+                except Exception:
+                    if stream is not None:
+                        stream.cancel()
+                    raise
+        logger.info("Transcription complete")
+
+    # 3) Summarize
+    progress("summarize", 0, 1)
+    with profiler.stage("summarize"):
+        if stream is not None and stream.started:
+            summary = stream.finish(
+                progress=lambda done, total: progress("summarize", done, total)
+            )
+        else:
+            # A transcript reused from a checkpoint or fingerprint match was
+            # not streamed and is summarized as a whole
+            if stream is not None:
+                stream.cancel()
+            summary = summarizer.summarize(
+                text,
+                detail=detail_level,
+                progress=lambda done, total: progress("summarize", done, total),
+                checkpoint_id=metadata.get("id") or None,
+                show_id=_show_id(metadata),
+                llm_slot=llm_slot,
+            )
+    logger.info("Summarization complete")
+
+    return {
+        "title": metadata.get("title", ""),
+        "summary": summary,
+        "thumbnail": metadata.get("thumbnail", ""),
+        "channel": metadata.get("channel", ""),
+        "duration_string": metadata.get("duration_string", ""),
+        "release_date": metadata.get("release_date", ""),
+    }
+
+
+def _show_id(metadata: dict) -> str | None:
+    return metadata.get("channel_id") or metadata.get("show_id") or None
+
+
+def _no_progress(stage: str, done: float, total: float):
+    pass
+
+
+class Pipeline_Job:
+    """
+    State of a pipeline run executed by a Job_Runner.
+
+    Attributes:
+        key (tuple): The input the job was submitted for.
+        stage (str): The stage currently running, "done" or "failed".
+        stage_progress (float): Completed fraction of the current stage (0.0–1.0).
+        completed_stages (list): Names of the finished stages, in order.
+        result (dict | None): The pipeline result once finished.
+        error (str | None): The error message if the job failed.
+        finished_at (float | None): `time.monotonic()` when the job ended.
+    """
+
+    def __init__(self, key: tuple):
+        self.key = key
+        self.stage = "queued"
+        self.stage_progress = 0.0
+        self.completed_stages = []
+        self.result = None
+        self.error = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def done(self) -> bool:
+        return self.finished_at is not None
+
+    def update(self, stage: str, done: float, total: float):
+        """Progress callback handed to `run_pipeline`."""
+        with self._lock:
+            if stage != self.stage and self.stage in STAGES:
+                self.completed_stages.append(self.stage)
+            self.stage = stage
+            self.stage_progress = min(1.0, done / total) if total else 0.0
+
+    def _finish(self, result: dict | None, error: str | None):
+        with self._lock:
+            if self.stage in STAGES and error is None:
+                self.completed_stages.append(self.stage)
+            self.stage = "failed" if error else "done"
+            self.result = result
+            self.error = error
+            self.finished_at = time.monotonic()
+
+
+class Job_Runner:
+    """
+    Runs pipeline jobs on background threads and keeps their results for a while.
+
+    A job is identified by its input key; submitting the same key again returns
+    the running job, or the finished one until `result_ttl` seconds have passed.
+    Failed jobs are not kept, so a new submission retries them.
+    """
+
+    def __init__(self, max_workers: int = 1, result_ttl: float = 3600):
+        self.result_ttl = result_ttl
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="pipeline"
+        )
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> Pipeline_Job | None:
+        """Returns the job for `key`, or None if there is none or it expired."""
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and self._expired(job):
+                del self._jobs[key]
+                return None
+            return job
+
+    def submit(self, key: tuple, fn: Callable[..., dict], **kwargs) -> Pipeline_Job:
+        """
+        Starts `fn(progress=..., **kwargs)` in the background unless a live job exists for `key`.
+        """
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and not job.error and not self._expired(job):
+                return job
+
+            job = Pipeline_Job(key)
+            self._jobs[key] = job
+            self._executor.submit(self._run, job, fn, kwargs)
+            return job
+
+    def _run(self, job: Pipeline_Job, fn: Callable[..., dict], kwargs: dict):
+        try:
+            result = fn(progress=job.update, **kwargs)
+        except Exception as e:
+            logger.exception("Pipeline job failed")
+            job._finish(None, str(e))
+        else:
+            job._finish(result, None)
+
+    def _expired(self, job: Pipeline_Job) -> bool:
+        return job.done and time.monotonic() - job.finished_at > self.result_ttl
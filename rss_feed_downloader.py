@@ -1,15 +1,37 @@
 import os
+import time
 import logging
 import requests
-import feedparser
+import tempfile
+import threading
+
+from xml.etree import ElementTree
+from typing import Callable, List, Optional, Tuple
+from downloader import Downloader
+from utils.checkpoint_utils import checkpoint_key
+from utils.transcript_utils import TRANSCRIPT_FORMATS, fetch_transcript
 
 logger = logging.getLogger(__name__)
 
+# `podcast:transcript` tags, under the current and the original namespace URI
+TRANSCRIPT_TAGS = (
+    "{https://podcastindex.org/namespace/1.0}transcript",
+    "{https://github.com/Podcastindex-org/podcast-namespace/blob/main/docs/1.0.md}transcript",
+)
+# Transcript formats, most preferred first
+TRANSCRIPT_PREFERENCE = ("vtt", "srt", "json", "html", "text")
+
 
-class RSS_Feed_Downloader:
+class RSS_Feed_Downloader(Downloader):
     """
     A class for downloading podcast episodes from an RSS feed.
 
+    One request looks up its episode several times (admission probe,
+    published transcript, download), so found entries are kept for
+    `entry_cache_seconds` and the feed is parsed once per request. Missing
+    episodes are remembered for the shorter `missing_entry_cache_seconds`,
+    so repeated checks of a mistyped name do not fetch the feed each time.
+
     Attributes:
         config (dict): Configuration settings, including debug mode.
         debug (bool): Flag indicating whether debug logging is enabled.
@@ -24,17 +46,30 @@ class RSS_Feed_Downloader:
         """
         self.config = config
         self.debug = self.config.get("debug", False)
+        self.entry_cache_seconds = self.config.get("entry_cache_seconds", 300)
+        self.missing_entry_cache_seconds = self.config.get(
+            "missing_entry_cache_seconds", 60
+        )
+
+        self._entries = {}
+        self._entries_lock = threading.Lock()
 
-    def download_episode(self, source_url: str, episode_name: str | None) -> str:
+    def download_episode(
+        self,
+        source_url: str,
+        episode_name: str | None,
+        on_prefix: Optional[Callable[[str, dict], bool]] = None,
+    ) -> Tuple[str | None, dict]:
         """
         Downloads a podcast episode from the given RSS feed URL.
 
         Parameters:
             source_url (str): The URL of the RSS feed.
             episode_name (str | None): The name of the episode to download. If None, defaults to the latest episode.
+            on_prefix (Callable, optional): Called with the path of the partial file and the episode metadata once "fingerprint_prefix_bytes" are downloaded. Returning True stops the download.
 
         Returns:
-            tuple: (file_path (str), episode_name (str), episode_id (str)) if successful.
+            tuple: (file_path (str), metadata (dict)) if successful, or (None, metadata) if `on_prefix` stopped the download.
 
         Raises:
             ValueError: If the episode is not found or no audio file is available.
@@ -50,7 +85,7 @@ class RSS_Feed_Downloader:
 
         # Extract episode URL and generate filename
         mp3_url = entry.enclosures[0].href
-        episode_id = mp3_url.split("/")[-1].split(".")[0]
+        episode_id = self._get_episode_id(mp3_url)
 
         output_dir = os.path.join(
             os.getcwd(), self.config.get("downloads_dir", "downloads"), episode_id
@@ -60,28 +95,198 @@ class RSS_Feed_Downloader:
             output_dir, episode_id, episode_id + self.config.get("mp3_ext", ".mp3")
         )
 
+        metadata = self._get_metadata(entry, episode_id, source_url)
+
         if self.debug and os.path.exists(file_path):
             logger.info("Episode already downloaded.")
-            return file_path, episode_name, episode_id
+            return file_path, metadata
 
         # Download the episode in chunks
         response = requests.get(mp3_url, stream=True)
         response.raise_for_status()
 
-        with open(file_path, "wb") as file:
-            for chunk in response.iter_content(
-                chunk_size=self.config.get("chunk_size", 8192)
-            ):
-                file.write(chunk)
+        # Download to a temporary name of its own, so an interrupted download is
+        # never reused and concurrent downloads of the episode do not mix
+        fd, part_path = tempfile.mkstemp(
+            dir=os.path.dirname(file_path),
+            prefix=f"{os.path.basename(file_path)}.",
+            suffix=".part",
+        )
+        prefix_bytes = self.config.get("fingerprint_prefix_bytes", 4 * 1024 * 1024)
+        written, prefix_checked, stopped = 0, on_prefix is None, False
+
+        try:
+            with os.fdopen(fd, "wb") as file:
+                for chunk in response.iter_content(
+                    chunk_size=self.config.get("chunk_size", 8192)
+                ):
+                    file.write(chunk)
+                    written += len(chunk)
+
+                    if not prefix_checked and written >= prefix_bytes:
+                        prefix_checked = True
+                        file.flush()
+                        if on_prefix(part_path, metadata):
+                            stopped = True
+                            break
+        except BaseException:
+            response.close()
+            os.remove(part_path)
+            raise
+
+        if stopped:
+            response.close()
+            os.remove(part_path)
+            if self.debug:
+                logger.info("Stopped download, the episode is already known.")
+            return None, metadata
+
+        os.replace(part_path, file_path)
 
         if self.debug:
             logger.info("Successfully downloaded episode.")
 
-        return file_path, episode_name, episode_id
+        return file_path, metadata
+
+    def fetch_transcript(
+        self, source_url: str, episode_name: str | None
+    ) -> Tuple[str | None, dict]:
+        """
+        Fetches a transcript linked from the episode's `podcast:transcript` tags.
+
+        An episode may link several formats; the supported ones are tried in
+        the order of TRANSCRIPT_PREFERENCE until one can be fetched.
+
+        Parameters:
+            source_url (str): The URL of the RSS feed.
+            episode_name (str | None): The name of the episode.
+
+        Returns:
+            tuple: (transcript_text (str | None), metadata (dict)).
+        """
+        if not self.config.get("use_existing_transcripts", True):
+            return None, {}
+
+        entry = self._get_episode_entry(source_url, episode_name)
+        if not entry:
+            return None, {}
+
+        candidates = []
+        for transcript in entry.get("podcast_transcripts", []):
+            fmt = TRANSCRIPT_FORMATS.get(
+                transcript.get("type", "").split(";")[0].strip()
+            )
+            if fmt is not None and transcript.get("url"):
+                candidates.append((TRANSCRIPT_PREFERENCE.index(fmt), fmt, transcript["url"]))
+
+        for _, fmt, url in sorted(candidates):
+            try:
+                text = fetch_transcript(url, fmt)
+                break
+            except Exception as e:
+                logger.warning(f"Failed to fetch transcript ({fmt}): {e}")
+        else:
+            return None, {}
+
+        if self.debug:
+            logger.info(f"Using published transcript ({fmt}).")
+
+        episode_id = (
+            self._get_episode_id(entry.enclosures[0].href)
+            if entry.get("enclosures")
+            else ""
+        )
+        return text, self._get_metadata(entry, episode_id, source_url)
+
+    def probe_episode(self, source_url: str, episode_name: str | None) -> dict:
+        """
+        Reads the duration and size from the feed's `itunes:duration` and enclosure length.
+
+        Parameters:
+            source_url (str): The URL of the RSS feed.
+            episode_name (str | None): The name of the episode.
+
+        Returns:
+            dict: "duration_seconds" and "size_bytes", either of which may be None if unknown.
+
+        Raises:
+            ValueError: If the episode is not found.
+        """
+        entry = self._get_episode_entry(source_url, episode_name)
+        if not entry:
+            raise ValueError("Episode not found. Please check the episode name.")
+
+        size_bytes = None
+        if entry.get("enclosures"):
+            length = entry.enclosures[0].get("length")
+            if length and str(length).isdigit() and int(length) > 0:
+                size_bytes = int(length)
+
+        return {
+            "duration_seconds": self._parse_duration(entry.get("itunes_duration", "")),
+            "size_bytes": size_bytes,
+        }
+
+    def _parse_duration(self, duration: str) -> float | None:
+        """Parses an `itunes:duration` value ("HH:MM:SS", "MM:SS" or seconds)."""
+        try:
+            seconds = 0.0
+            for part in str(duration).strip().split(":"):
+                seconds = seconds * 60 + float(part)
+            return seconds or None
+        except ValueError:
+            return None
+
+    def _get_episode_id(self, mp3_url: str) -> str:
+        """
+        Builds the episode identifier from the enclosure file name and a hash of
+        its full URL, so episodes of different feeds sharing a file name such as
+        `episode.mp3` do not collide.
+        """
+        file_stem = mp3_url.split("?")[0].split("/")[-1].split(".")[0]
+        return f"{file_stem}_{checkpoint_key(mp3_url)[:8]}"
+
+    def _get_metadata(self, entry, episode_id: str, source_url: str) -> dict:
+        """
+        Builds episode metadata in the same shape as the YouTube downloader.
+
+        Parameters:
+            entry: The feed entry of the episode.
+            episode_id (str): The identifier used for the download directory.
+            source_url (str): The URL of the RSS feed, which identifies the show.
+
+        Returns:
+            dict: The episode metadata.
+        """
+        return {
+            "id": episode_id,
+            "title": entry.get("title", ""),
+            "thumbnail": entry.get("image", {}).get("href", ""),
+            "channel": entry.get("author", ""),
+            "duration_string": entry.get("itunes_duration", ""),
+            "duration": self._parse_duration(entry.get("itunes_duration", "")),
+            "release_date": entry.get("published", ""),
+            "show_id": source_url,
+        }
+
+    def has_episode(self, source_url: str, episode_name: str) -> bool:
+        """
+        Checks if an episode with the given name exists in the RSS feed.
+
+        Parameters:
+            source_url (str): The URL of the RSS feed.
+            episode_name (str): The title of the episode to search for.
+
+        Returns:
+            bool: True if the episode exists, False otherwise.
+        """
+        return self._get_episode_entry(source_url, episode_name) is not None
 
     def _get_episode_entry(self, source_url: str, episode_name: str):
         """
-        Retrieves an episode entry from an RSS feed.
+        Retrieves an episode entry from an RSS feed, reusing a lookup from
+        the last `entry_cache_seconds` (`missing_entry_cache_seconds` if the
+        episode was not found).
 
         Parameters:
             source_url (str): The URL of the RSS feed.
@@ -90,8 +295,61 @@ class RSS_Feed_Downloader:
         Returns:
             dict or None: The episode entry if found, otherwise None.
         """
-        feed = feedparser.parse(source_url)
-        for entry in feed.entries:
+        key = (source_url, episode_name.lower())
+        now = time.monotonic()
+        with self._entries_lock:
+            cached = self._entries.get(key)
+            if cached is not None and not self._entry_expired(cached, now):
+                return cached[1]
+
+        entry = self._parse_episode_entry(source_url, episode_name)
+
+        with self._entries_lock:
+            self._entries = {
+                k: v for k, v in self._entries.items() if not self._entry_expired(v, now)
+            }
+            self._entries[key] = (now, entry)
+        return entry
+
+    def _entry_expired(self, cached: tuple, now: float) -> bool:
+        # Misses expire sooner, the episode may be published any time
+        found_at, entry = cached
+        ttl = self.entry_cache_seconds if entry is not None else self.missing_entry_cache_seconds
+        return now - found_at >= ttl
+
+    def _parse_episode_entry(self, source_url: str, episode_name: str):
+        """
+        Parses the feed and returns the entry titled `episode_name`, or None.
+
+        feedparser keeps only the last `podcast:transcript` tag of an item, so
+        all of them are read from the feed XML into "podcast_transcripts".
+        """
+        import feedparser
+
+        try:
+            response = requests.get(source_url, timeout=30)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            logger.warning(f"Failed to fetch feed: {e}")
+            return None
+
+        feed = feedparser.parse(response.content)
+        for index, entry in enumerate(feed.entries):
             if episode_name.lower() == entry.title.lower():
+                entry["podcast_transcripts"] = self._get_transcript_tags(
+                    response.content, index
+                )
                 return entry
         return None
+
+    def _get_transcript_tags(self, feed_content: bytes, index: int) -> List[dict]:
+        """Returns the attributes of every `podcast:transcript` tag of the feed's `index`-th item."""
+        try:
+            items = ElementTree.fromstring(feed_content).findall("./channel/item")
+        except ElementTree.ParseError as e:
+            logger.warning(f"Failed to read transcript tags: {e}")
+            return []
+
+        if index >= len(items):
+            return []
+        return [dict(tag.attrib) for tag in items[index] if tag.tag in TRANSCRIPT_TAGS]
@@ -0,0 +1,231 @@
+import heapq
+import logging
+import itertools
+import threading
+
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Priority classes, highest first
+PRIORITIES = ("interactive", "bulk")
+
+
+class Slot_Ticket:
+    """
+    A request for a slot of a Fair_Scheduler, held while the work runs.
+
+    Attributes:
+        priority (str): The priority class of the request.
+        tenant (str): The tenant the work is accounted to.
+    """
+
+    def __init__(
+        self,
+        scheduler: "Fair_Scheduler",
+        priority: str,
+        tenant: str,
+        start_tag: float,
+        finish_tag: float,
+        sequence: int,
+    ):
+        self.scheduler = scheduler
+        self.priority = priority
+        self.tenant = tenant
+        self.rank = PRIORITIES.index(priority)
+        self.start_tag = start_tag
+        self.finish_tag = finish_tag
+        self.sequence = sequence
+
+    def checkpoint(self) -> bool:
+        """
+        Marks a chunk boundary: if higher-priority work is waiting, the slot is
+        handed over and this call blocks until it is granted again.
+
+        Returns:
+            bool: Whether the slot was handed over.
+        """
+        return self.scheduler._yield_slot(self)
+
+
+class Fair_Scheduler:
+    """
+    Hands out a limited number of slots of a shared resource (the ASR model or
+    the OpenAI quota) to concurrent pipeline runs.
+
+    Waiting requests are served by strict priority between classes: an
+    "interactive" request always goes before a "bulk" one. Within a class,
+    tenants share the slots by weighted fair queuing (start-time fair
+    queuing): every request gets a virtual finish tag of
+    `max(virtual_time, tenant's last finish tag) + cost / weight`, and the
+    smallest tag is served first. A tenant with weight 2 gets twice the
+    share of a tenant with weight 1, and a tenant submitting 200 jobs cannot
+    starve one submitting a single job.
+
+    Holders call `Slot_Ticket.checkpoint` at chunk boundaries, where lower-
+    priority work gives its slot to waiting higher-priority work and resumes
+    once a slot is free again. Bulk work therefore uses all spare capacity
+    without delaying interactive requests by more than one chunk.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        slots: int = 1,
+        tenant_weights: dict | None = None,
+        default_weight: float = 1.0,
+    ):
+        """
+        Parameters:
+            name (str): Name of the resource, used in logs.
+            slots (int, optional): Number of requests served concurrently. Defaults to 1.
+            tenant_weights (dict | None, optional): Share of each tenant, by tenant name.
+            default_weight (float, optional): Share of tenants missing from `tenant_weights`. Defaults to 1.0.
+        """
+        self.name = name
+        self.slots = slots
+        self.tenant_weights = tenant_weights or {}
+        self.default_weight = default_weight
+
+        self._free = slots
+        self._waiting = []
+        self._virtual_time = [0.0] * len(PRIORITIES)
+        self._last_finish = {}
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+
+    def acquire(
+        self, priority: str = "interactive", tenant: str = "default", cost: float = 1.0
+    ) -> Slot_Ticket:
+        """
+        Blocks until a slot is granted.
+
+        Parameters:
+            priority (str, optional): "interactive" or "bulk". Defaults to "interactive".
+            tenant (str, optional): The tenant the work is accounted to. Defaults to "default".
+            cost (float, optional): Expected amount of work, e.g. audio minutes or thousands of tokens. Defaults to 1.0.
+
+        Returns:
+            Slot_Ticket: The granted slot; pass it to `release` when done.
+
+        Raises:
+            ValueError: If the priority class is unknown.
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(
+                f"Unknown priority '{priority}'. Choose one of: {', '.join(PRIORITIES)}."
+            )
+
+        rank = PRIORITIES.index(priority)
+        weight = self.tenant_weights.get(tenant, self.default_weight)
+
+        with self._condition:
+            start_tag = max(
+                self._virtual_time[rank], self._last_finish.get((rank, tenant), 0.0)
+            )
+            finish_tag = start_tag + max(cost, 0.0) / weight
+            self._last_finish[(rank, tenant)] = finish_tag
+
+            ticket = Slot_Ticket(
+                self, priority, tenant, start_tag, finish_tag, next(self._sequence)
+            )
+            self._wait_for_slot(ticket)
+        return ticket
+
+    def release(self, ticket: Slot_Ticket):
+        """Returns the slot held by `ticket`."""
+        with self._condition:
+            self._free += 1
+            self._condition.notify_all()
+
+    @contextmanager
+    def slot(
+        self, priority: str = "interactive", tenant: str = "default", cost: float = 1.0
+    ):
+        """Holds a slot while the block runs, see `acquire`."""
+        ticket = self.acquire(priority, tenant, cost)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def _wait_for_slot(self, ticket: Slot_Ticket):
+        # Called with the condition held
+        heapq.heappush(
+            self._waiting, (ticket.rank, ticket.finish_tag, ticket.sequence, ticket)
+        )
+        while not (self._free > 0 and self._waiting[0][3] is ticket):
+            self._condition.wait()
+
+        heapq.heappop(self._waiting)
+        self._free -= 1
+        self._virtual_time[ticket.rank] = max(
+            self._virtual_time[ticket.rank], ticket.start_tag
+        )
+        # Another slot may still be free for the next waiter
+        self._condition.notify_all()
+
+    def _yield_slot(self, ticket: Slot_Ticket) -> bool:
+        with self._condition:
+            if not self._waiting or self._waiting[0][0] >= ticket.rank:
+                return False
+
+            logger.info(
+                f"Yielding {self.name} slot of {ticket.priority} work ({ticket.tenant}) "
+                f"to {PRIORITIES[self._waiting[0][0]]} work"
+            )
+            # The ticket keeps its tags, so it resumes ahead of later work of its class
+            self._free += 1
+            self._condition.notify_all()
+            self._wait_for_slot(ticket)
+            return True
+
+
+class Null_Ticket:
+    """Stands in for Slot_Ticket when scheduling is disabled."""
+
+    def checkpoint(self) -> bool:
+        return False
+
+
+class Null_Scheduler:
+    """Stands in for Fair_Scheduler when scheduling is disabled: every slot is granted at once."""
+
+    @contextmanager
+    def slot(
+        self, priority: str = "interactive", tenant: str = "default", cost: float = 1.0
+    ):
+        yield NULL_TICKET
+
+
+NULL_TICKET = Null_Ticket()
+NULL_SCHEDULER = Null_Scheduler()
+
+
+class Pipeline_Scheduler:
+    """
+    The schedulers in front of the two shared resources of a pipeline run.
+
+    Attributes:
+        asr (Fair_Scheduler | Null_Scheduler): Slots of the speech recognition model (`asr_slots`).
+        llm (Fair_Scheduler | Null_Scheduler): Concurrent summarization requests (`llm_slots`).
+    """
+
+    def __init__(self, config: dict):
+        """
+        Parameters:
+            config (dict): The "scheduler" section of the configuration.
+        """
+        self.config = config
+        if not config.get("enabled", False):
+            self.asr = self.llm = NULL_SCHEDULER
+            return
+
+        tenant_weights = config.get("tenant_weights", {})
+        default_weight = config.get("default_weight", 1.0)
+        self.asr = Fair_Scheduler(
+            "asr", config.get("asr_slots", 1), tenant_weights, default_weight
+        )
+        self.llm = Fair_Scheduler(
+            "llm", config.get("llm_slots", 4), tenant_weights, default_weight
+        )
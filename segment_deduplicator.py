@@ -0,0 +1,286 @@
+import os
+import re
+import json
+import random
+import hashlib
+import logging
+
+from typing import List, Tuple
+from utils.checkpoint_utils import checkpoint_key, file_lock, write_checkpoint
+from utils.openai_utils import num_tokens_from_text
+
+logger = logging.getLogger(__name__)
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+WORD_PATTERN = re.compile(r"[a-z0-9']+")
+COLLAPSED_MARKER = " [Repeated segment omitted]"
+
+
+class Segment_Deduplicator:
+    """
+    Removes near-duplicate and boilerplate segments from a transcript before summarization.
+
+    Segments (sentences) are shingled into word n-grams and hashed into MinHash
+    signatures, which are bucketed with locality-sensitive hashing (LSH bands):
+    - A segment that nearly repeats an earlier segment of the same episode
+      (estimated Jaccard similarity >= `threshold`) is a duplicate.
+    - A segment that also appears in at least `min_episodes` earlier episodes of
+      the same show (sponsor reads, intros, outros) is boilerplate.
+
+    Both are dropped, or collapsed into a short marker if "action" is "collapse".
+    Per-show band hashes of recent episodes are stored in `index_dir`, so
+    everything runs offline. The index is updated under a file lock, so
+    episodes of one show processed concurrently are all recorded.
+    """
+
+    def __init__(self, config: dict):
+        """
+        Parameters:
+            config (dict): The "dedup" section of the summarizer configuration.
+        """
+        self.config = config
+        self.num_perm = config.get("num_perm", 64)
+        self.bands = config.get("bands", 16)
+        self.rows = self.num_perm // self.bands
+        self.shingle_size = config.get("shingle_size", 3)
+        self.min_words = config.get("min_words", 8)
+        self.threshold = config.get("threshold", 0.7)
+        self.min_episodes = config.get("min_episodes", 2)
+        self.max_episodes = config.get("max_episodes", 20)
+        self.action = config.get("action", "drop")
+        self.index_dir = config.get("index_dir", os.path.join("downloads", "_shows"))
+
+        # Band matches expected for two segments at the similarity threshold
+        self.min_band_matches = max(1, round(self.bands * self.threshold**self.rows))
+
+        rng = random.Random(config.get("seed", 1))
+        self._permutations = [
+            (rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME))
+            for _ in range(self.num_perm)
+        ]
+
+    def deduplicate(
+        self,
+        text: str,
+        delimiter: str = ".",
+        show_id: str | None = None,
+        episode_id: str | None = None,
+    ) -> Tuple[str, dict]:
+        """
+        Drops or collapses repeated segments of a transcript.
+
+        Parameters:
+            text (str): The transcript.
+            delimiter (str, optional): Delimiter separating segments. Defaults to ".".
+            show_id (str | None, optional): Identifier of the show, enables cross-episode boilerplate detection.
+            episode_id (str | None, optional): Identifier of the episode, used to record it in the show index.
+
+        Returns:
+            tuple: (deduplicated_text (str), stats (dict)) where stats holds the
+            segment counts and "tokens_saved".
+        """
+        session = self.start(show_id, episode_id)
+        deduplicated = session.filter(text, delimiter)
+        return deduplicated, session.close()
+
+    def start(
+        self, show_id: str | None = None, episode_id: str | None = None
+    ) -> "Dedup_Session":
+        """
+        Starts deduplicating a transcript that arrives in parts.
+
+        Parameters:
+            show_id (str | None, optional): Identifier of the show, enables cross-episode boilerplate detection.
+            episode_id (str | None, optional): Identifier of the episode, used to record it in the show index.
+
+        Returns:
+            Dedup_Session: Filters the parts in order; `close` records the episode in the show index.
+        """
+        return Dedup_Session(self, show_id, episode_id)
+
+    def _drop(self, kept: List[str]):
+        # Consecutive dropped segments share a single marker
+        if self.action == "collapse" and (not kept or kept[-1] != COLLAPSED_MARKER):
+            kept.append(COLLAPSED_MARKER)
+
+    def _signature(self, words: List[str]) -> List[int]:
+        """Computes the MinHash signature of a segment's word shingles."""
+        size = min(self.shingle_size, len(words))
+        shingle_hashes = {
+            int.from_bytes(
+                hashlib.blake2b(
+                    " ".join(words[i : i + size]).encode("utf-8"), digest_size=8
+                ).digest(),
+                "big",
+            )
+            for i in range(len(words) - size + 1)
+        }
+        return [
+            min(((a * h + b) % MERSENNE_PRIME) & MAX_HASH for h in shingle_hashes)
+            for a, b in self._permutations
+        ]
+
+    def _band_keys(self, signature: List[int]) -> List[int]:
+        """Hashes each LSH band of a signature, prefixed by its band index."""
+        keys = []
+        for band in range(self.bands):
+            rows = signature[band * self.rows : (band + 1) * self.rows]
+            digest = hashlib.blake2b(
+                f"{band}:{rows}".encode("utf-8"), digest_size=8
+            ).digest()
+            keys.append(int.from_bytes(digest, "big"))
+        return keys
+
+    def _is_duplicate(
+        self, signature: List[int], band_keys: List[int], signatures_by_band: dict
+    ) -> bool:
+        for key in band_keys:
+            for candidate in signatures_by_band.get(key, []):
+                agreement = sum(x == y for x, y in zip(signature, candidate))
+                if agreement / self.num_perm >= self.threshold:
+                    return True
+        return False
+
+    def _prior_episode_count(self, band_keys: List[int], prior_bands: dict) -> int:
+        """Counts earlier episodes with a segment sharing enough bands with this one."""
+        matches = {}
+        for key in band_keys:
+            for episode_id in prior_bands.get(key, ()):
+                matches[episode_id] = matches.get(episode_id, 0) + 1
+        return sum(count >= self.min_band_matches for count in matches.values())
+
+    def _prior_bands(self, show_index: dict, episode_id: str | None) -> dict:
+        """Maps band keys of earlier episodes (excluding this one) to their episode ids."""
+        prior_bands = {}
+        for episode in show_index["episodes"]:
+            if episode["id"] == episode_id:
+                continue
+            for key in episode["bands"]:
+                prior_bands.setdefault(key, set()).add(episode["id"])
+        return prior_bands
+
+    def _index_path(self, show_id: str) -> str:
+        return os.path.join(self.index_dir, f"{checkpoint_key(show_id)}.json")
+
+    def _load_show_index(self, show_id: str) -> dict:
+        try:
+            with open(self._index_path(show_id), "r", encoding="utf-8") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {"episodes": []}
+
+    def _save_show_index(
+        self, show_id: str, episode_id: str, episode_bands: List[List[int]]
+    ):
+        """Adds an episode to the show index, merging with episodes recorded meanwhile."""
+        index_path = self._index_path(show_id)
+        with file_lock(index_path):
+            # Reload: other episodes of the show may have closed since this one started
+            show_index = self._load_show_index(show_id)
+            episodes = [e for e in show_index["episodes"] if e["id"] != episode_id]
+            episodes.append(
+                {
+                    "id": episode_id,
+                    "bands": sorted({key for keys in episode_bands for key in keys}),
+                }
+            )
+            show_index = {"show_id": show_id, "episodes": episodes[-self.max_episodes :]}
+            write_checkpoint(index_path, json.dumps(show_index))
+
+
+class Dedup_Session:
+    """
+    Deduplication state of one transcript, see `Segment_Deduplicator.start`.
+
+    Segments are compared against all earlier parts of the same transcript,
+    so filtering a transcript in parts drops the same segments as filtering
+    it at once.
+    """
+
+    def __init__(
+        self,
+        deduplicator: Segment_Deduplicator,
+        show_id: str | None,
+        episode_id: str | None,
+    ):
+        self.deduplicator = deduplicator
+        self.show_id = show_id
+        self.episode_id = episode_id
+        show_index = (
+            deduplicator._load_show_index(show_id) if show_id else {"episodes": []}
+        )
+        self.prior_bands = deduplicator._prior_bands(show_index, episode_id)
+        self.episode_bands = []
+        self.signatures_by_band = {}
+        self.stats = {
+            "segments": 0,
+            "dropped_duplicates": 0,
+            "dropped_boilerplate": 0,
+            "tokens_before": 0,
+            "tokens_after": 0,
+        }
+
+    def filter(self, text: str, delimiter: str = ".") -> str:
+        """
+        Drops or collapses the repeated segments of the next part of the transcript.
+
+        Returns:
+            str: The part without repeated segments.
+        """
+        deduplicator = self.deduplicator
+        segments = text.split(delimiter)
+        kept = []
+
+        for segment in segments:
+            words = WORD_PATTERN.findall(segment.lower())
+            if len(words) < deduplicator.min_words:
+                kept.append(segment)
+                continue
+
+            signature = deduplicator._signature(words)
+            band_keys = deduplicator._band_keys(signature)
+
+            if deduplicator._is_duplicate(signature, band_keys, self.signatures_by_band):
+                self.stats["dropped_duplicates"] += 1
+                deduplicator._drop(kept)
+                continue
+
+            self.episode_bands.append(band_keys)
+            if (
+                deduplicator._prior_episode_count(band_keys, self.prior_bands)
+                >= deduplicator.min_episodes
+            ):
+                self.stats["dropped_boilerplate"] += 1
+                deduplicator._drop(kept)
+                continue
+
+            for key in band_keys:
+                self.signatures_by_band.setdefault(key, []).append(signature)
+            kept.append(segment)
+
+        deduplicated = delimiter.join(kept)
+        self.stats["segments"] += len(segments)
+        self.stats["tokens_before"] += num_tokens_from_text(text)
+        self.stats["tokens_after"] += num_tokens_from_text(deduplicated)
+        return deduplicated
+
+    def close(self) -> dict:
+        """
+        Records the episode in the show index.
+
+        Returns:
+            dict: The segment counts and "tokens_saved" of all parts.
+        """
+        if self.show_id and self.episode_id:
+            self.deduplicator._save_show_index(
+                self.show_id, self.episode_id, self.episode_bands
+            )
+
+        stats = dict(self.stats)
+        stats["tokens_saved"] = stats["tokens_before"] - stats["tokens_after"]
+        logger.info(
+            f"Deduplication removed {stats['dropped_duplicates']} repeated and "
+            f"{stats['dropped_boilerplate']} boilerplate segments, saving {stats['tokens_saved']} tokens"
+        )
+        return stats
@@ -1,8 +1,12 @@
 import json
+import uuid
 import logging
 import streamlit as st
 
 from dotenv import load_dotenv
+from pipeline import Job_Runner, run_pipeline
+from scheduler import Pipeline_Scheduler
+from utils.profiling_utils import get_profiler
 from downloader import Downloader
 from openai_summarizer import OpenAI_Summarizer
 from youtube_downloader import YouTube_Downloader
@@ -11,7 +15,7 @@ from rss_feed_downloader import RSS_Feed_Downloader
 from utils.streamlit_utils import (
     is_valid_youtube_url,
     is_valid_rss_feed_url,
-    is_rss_feed_episode_valid,
+    show_pipeline_progress,
     show_succesfully_downloaded,
     show_succesfully_summarized,
     show_succesfully_transcribed,
@@ -33,6 +37,31 @@ with open("config.json", "r") as f:
     config = json.load(f)
 
 
+@st.cache_resource
+def get_components() -> dict:
+    """
+    Creates the downloaders, transcriber and summarizer once per process,
+    so reruns and the background worker share the same loaded models.
+    """
+    return {
+        "youtube_downloader": YouTube_Downloader(config=config["youtube"]),
+        "rss_downloader": RSS_Feed_Downloader(config=config["rss"]),
+        "whisper_transcriber": Whisper_Transcriber(config=config["whisper"]),
+        "openai_summarizer": OpenAI_Summarizer(config=config["openai"]),
+        "scheduler": Pipeline_Scheduler(config.get("scheduler", {})),
+    }
+
+
+@st.cache_resource
+def get_job_runner() -> Job_Runner:
+    """Returns the process-wide runner that executes pipelines in the background."""
+    streamlit_config = config.get("streamlit", {})
+    return Job_Runner(
+        max_workers=streamlit_config.get("max_workers", 1),
+        result_ttl=streamlit_config.get("result_ttl", 3600),
+    )
+
+
 def summarize(
     summarizer: OpenAI_Summarizer,
     transcriber: Whisper_Transcriber,
@@ -43,6 +72,9 @@ def summarize(
     """
     Handles the entire process of downloading, transcribing, and summarizing a podcast episode.
 
+    The pipeline runs on a background worker; this function only submits it
+    and renders its progress, so other widgets stay responsive meanwhile.
+
     Parameters:
         summarizer (OpenAI_Summarizer): The summarizer instance for generating summaries.
         transcriber (Whisper_Transcriber): The transcriber instance for converting audio to text.
@@ -60,31 +92,63 @@ def summarize(
     )
     st.divider()
 
-    mp3_file_path, transcribed_text = "", ""
+    runner = get_job_runner()
+    key = (source_url, episode_name, detail_level)
 
     if st.button("Summarize"):
-        # Step 1: Download the episode
-        with st.spinner("Downloading episode...", show_time=True):
-            mp3_file_path, mp3_file_title, video_id = downloader.download_episode(
-                source_url, episode_name
-            )
-            show_succesfully_downloaded(mp3_file_title)
-
-        # Step 2: Transcribe the episode
-        if mp3_file_path:
-            with st.spinner("Transcribing episode...", show_time=True):
-                transcribed_text = transcriber.transcribe(
-                    audio_path=mp3_file_path, video_id=video_id
-                )
-                show_succesfully_transcribed()
+        runner.submit(
+            key,
+            run_pipeline,
+            downloader=downloader,
+            transcriber=transcriber,
+            summarizer=summarizer,
+            source_url=source_url,
+            episode_name=episode_name,
+            detail_level=detail_level,
+            profiler=get_profiler(
+                config.get("profiling", {}), request_id=uuid.uuid4().hex[:12]
+            ),
+            scheduler=get_components()["scheduler"],
+            priority="interactive",
+            tenant="streamlit",
+        )
 
-        # Step 3: Summarize the transcription
-        if transcribed_text:
-            with st.spinner("Summarizing transcription...", show_time=True):
-                summarized_text = summarizer.summarize(
-                    transcribed_text, detail=detail_level
-                )
-                show_succesfully_summarized(summarized_text)
+    job = runner.get(key)
+    if job is not None:
+        # Poll only while the job is running; finished jobs render once
+        polling = not job.done
+        st.fragment(show_job, run_every=1 if polling else None)(runner, key, polling)
+
+
+def show_job(runner: Job_Runner, key: tuple, polling: bool):
+    """
+    Renders the progress or the result of the pipeline job for `key`.
+
+    Parameters:
+        runner (Job_Runner): The runner the job was submitted to.
+        key (tuple): The job input key.
+        polling (bool): Whether this fragment is refreshing on a timer.
+    """
+    job = runner.get(key)
+    if job is None:
+        return
+
+    if job.done and polling:
+        # Rerun the whole app once to stop the timer
+        st.rerun()
+
+    for stage in job.completed_stages:
+        if stage == "download" and job.result:
+            show_succesfully_downloaded(job.result.get("title", ""))
+        elif stage == "transcribe":
+            show_succesfully_transcribed()
+
+    if job.error:
+        st.error(f"Failed to summarize the episode: {job.error}")
+    elif job.result:
+        show_succesfully_summarized(job.result.get("summary", ""))
+    else:
+        show_pipeline_progress(job.stage, job.stage_progress)
 
 
 def main():
@@ -93,28 +157,12 @@ def main():
     """
     st.title("Podcast Summarizer")
 
-    # Initialize session state for necessary components
-    if "youtube_downloader" not in st.session_state:
-        st.session_state.youtube_downloader = YouTube_Downloader(
-            config=config["youtube"]
-        )
-
-    if "rss_downloader" not in st.session_state:
-        st.session_state.rss_downloader = RSS_Feed_Downloader(config=config)
-
-    if "whisper_transcriber" not in st.session_state:
-        st.session_state.whisper_transcriber = Whisper_Transcriber(
-            config=config["whisper"]
-        )
-
-    if "openai_summarizer" not in st.session_state:
-        st.session_state.openai_summarizer = OpenAI_Summarizer(config=config["openai"])
-
-    # Retrieve instances from session state
-    rss_downloader = st.session_state.rss_downloader
-    openai_summarizer = st.session_state.openai_summarizer
-    youtube_downloader = st.session_state.youtube_downloader
-    whisper_transcriber = st.session_state.whisper_transcriber
+    # Retrieve the shared instances
+    components = get_components()
+    rss_downloader = components["rss_downloader"]
+    openai_summarizer = components["openai_summarizer"]
+    youtube_downloader = components["youtube_downloader"]
+    whisper_transcriber = components["whisper_transcriber"]
 
     # User selects platform type
     choice = st.radio(
@@ -144,7 +192,7 @@ def main():
             if is_valid_rss_feed_url(source_url):
                 episode_name = st.text_input("Enter Episode Name:", "")
                 if episode_name:
-                    if is_rss_feed_episode_valid(source_url, episode_name):
+                    if rss_downloader.has_episode(source_url, episode_name):
                         summarize(
                             summarizer=openai_summarizer,
                             transcriber=whisper_transcriber,
@@ -0,0 +1,101 @@
+import os
+import hashlib
+import tempfile
+
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def read_checkpoint(path: str) -> str | None:
+    """
+    Reads a checkpoint written by `write_checkpoint`.
+
+    Parameters:
+    - path (str): The checkpoint file path.
+
+    Returns:
+    - str | None: The checkpointed text, or None if the checkpoint does not exist.
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as file:
+        return file.read()
+
+
+def write_checkpoint(path: str, text: str):
+    """
+    Durably writes a checkpoint.
+
+    The text is written to a temporary file, flushed to disk and renamed over
+    `path`, so a crash never leaves a partially written checkpoint behind.
+    Every writer uses its own temporary file, so concurrent writers of the
+    same checkpoint do not interfere; the last rename wins.
+
+    Parameters:
+    - path (str): The checkpoint file path.
+    - text (str): The text to store.
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(
+        dir=directory, prefix=f"{os.path.basename(path)}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as file:
+            file.write(text)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+@contextmanager
+def file_lock(path: str):
+    """
+    Holds an exclusive lock on `path`.lock while the block runs, so
+    read-modify-write updates of a shared file from several processes do
+    not overwrite each other.
+
+    Parameters:
+    - path (str): The file the lock protects.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(f"{path}.lock", "a+b") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def checkpoint_key(*parts) -> str:
+    """
+    Builds a short stable key from the inputs that determine a result.
+
+    Parameters:
+    - *parts: Values whose string representations identify the unit of work.
+
+    Returns:
+    - str: A 16 character hex digest.
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()[:16]
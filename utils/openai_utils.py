@@ -1,13 +1,51 @@
+import os
+import sys
 import logging
-import tiktoken
 
-from openai import OpenAI
-from typing import List, Optional, Tuple
+from functools import lru_cache
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from openai import OpenAI
 
 logger = logging.getLogger(__name__)
 
 
-def get_chat_completion(client: OpenAI, messages: List[dict], model: str) -> str:
+def get_openai_api_key() -> str:
+    """
+    Returns the OpenAI API key from the environment (or `.env`), falling back to
+    Streamlit secrets when running inside Streamlit.
+
+    Streamlit is never imported here, so the Flask app and workers do not pay for it.
+
+    Returns:
+    - str: The API key, or an empty string if none is configured.
+    """
+    api_key = os.getenv("OPENAI_API_KEY")
+    if api_key:
+        return api_key
+
+    if "streamlit" in sys.modules:
+        return sys.modules["streamlit"].secrets.get("OPENAI_API_KEY", "")
+    return ""
+
+
+def create_openai_client(base_url: Optional[str] = None) -> "OpenAI":
+    """
+    Creates an OpenAI client, importing the SDK on first use.
+
+    Parameters:
+    - base_url (Optional[str], optional): API endpoint to use instead of the default (e.g. a local stand-in server).
+
+    Returns:
+    - OpenAI: The client instance.
+    """
+    from openai import OpenAI
+
+    return OpenAI(api_key=get_openai_api_key(), base_url=base_url)
+
+
+def get_chat_completion(client: "OpenAI", messages: List[dict], model: str) -> str:
     """
     Calls the OpenAI API to generate a response based on given messages.
 
@@ -134,5 +172,12 @@ def num_tokens_from_text(text: str) -> int:
     Returns:
     - int: The estimated token count.
     """
-    encoding = tiktoken.encoding_for_model("gpt-3.5-turbo")
-    return len(encoding.encode(text))
+    return len(_get_encoding().encode(text))
+
+
+@lru_cache(maxsize=1)
+def _get_encoding():
+    """Loads the tokenizer on first use."""
+    import tiktoken
+
+    return tiktoken.encoding_for_model("gpt-3.5-turbo")
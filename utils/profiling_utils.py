@@ -0,0 +1,196 @@
+import os
+import re
+import sys
+import json
+import time
+import cProfile
+import logging
+import threading
+import tracemalloc
+
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+
+logger = logging.getLogger(__name__)
+
+
+class Request_Profiler:
+    """
+    Profiles a single pipeline run and writes the results to `profile_dir`.
+
+    Two modes are supported:
+    - "sampling": a background thread samples the profiled thread's stack every
+      `interval` seconds and writes folded stacks (`.folded`), the input format of
+      flamegraph.pl, speedscope and inferno.
+    - "deterministic": cProfile traces every call and writes a pstats dump
+      (`.prof`) for snakeviz, flameprof or gprof2dot.
+
+    In both modes, wall time and tracemalloc peak memory of every stage are
+    written to a `.json` file next to the profile. tracemalloc is process-wide,
+    so peaks include allocations made by other threads at the same time.
+    """
+
+    def __init__(
+        self,
+        profile_dir: str,
+        request_id: str,
+        mode: str = "sampling",
+        interval: float = 0.005,
+    ):
+        if mode not in ("sampling", "deterministic"):
+            raise ValueError(f"Unknown profiling mode: {mode}")
+
+        self.profile_dir = profile_dir
+        self.request_id = re.sub(r"[^A-Za-z0-9_.-]", "_", request_id)
+        self.mode = mode
+        self.interval = interval
+        self.stages = {}
+        self.output_paths = []
+
+        self._profile = None
+        self._sampler = None
+        self._samples = Counter()
+        self._stop = threading.Event()
+
+    def __enter__(self):
+        self._thread_id = threading.get_ident()
+        self._started_tracemalloc = not tracemalloc.is_tracing()
+        if self._started_tracemalloc:
+            tracemalloc.start()
+
+        if self.mode == "deterministic":
+            self._profile = cProfile.Profile()
+            try:
+                self._profile.enable()
+            except ValueError:
+                # Only one cProfile can be active at a time in a process
+                logger.warning("Another profiler is active, skipping cProfile.")
+                self._profile = None
+        else:
+            self._sampler = threading.Thread(
+                target=self._sample_loop, name="profiler-sampler", daemon=True
+            )
+            self._sampler.start()
+
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        total_seconds = time.perf_counter() - self._start
+
+        if self._profile is not None:
+            self._profile.disable()
+        if self._sampler is not None:
+            self._stop.set()
+            self._sampler.join()
+
+        try:
+            self._write(total_seconds, failed=exc_type is not None)
+        except OSError as e:
+            logger.error(f"Failed to write profile: {e}")
+        finally:
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+        return False
+
+    @contextmanager
+    def stage(self, name: str):
+        """Records wall time and peak traced memory of the enclosed block."""
+        tracemalloc.reset_peak()
+        start_bytes, _ = tracemalloc.get_traced_memory()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            _, peak_bytes = tracemalloc.get_traced_memory()
+            self.stages[name] = {
+                "seconds": round(time.perf_counter() - start, 4),
+                "peak_bytes": peak_bytes,
+                "peak_increase_bytes": max(0, peak_bytes - start_bytes),
+            }
+
+    def _sample_loop(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(
+                    f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+                )
+                frame = frame.f_back
+            if stack:
+                self._samples[";".join(reversed(stack))] += 1
+
+    def _write(self, total_seconds: float, failed: bool):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        base_path = os.path.join(
+            self.profile_dir, f"{time.strftime('%Y%m%d-%H%M%S')}_{self.request_id}"
+        )
+
+        if self._profile is not None:
+            self._profile.dump_stats(f"{base_path}.prof")
+            self.output_paths.append(f"{base_path}.prof")
+
+        if self._sampler is not None:
+            with open(f"{base_path}.folded", "w", encoding="utf-8") as file:
+                for stack, count in self._samples.most_common():
+                    file.write(f"{stack} {count}\n")
+            self.output_paths.append(f"{base_path}.folded")
+
+        with open(f"{base_path}.json", "w", encoding="utf-8") as file:
+            json.dump(
+                {
+                    "request_id": self.request_id,
+                    "mode": self.mode,
+                    "failed": failed,
+                    "total_seconds": round(total_seconds, 4),
+                    "stages": self.stages,
+                },
+                file,
+                indent=2,
+            )
+        self.output_paths.append(f"{base_path}.json")
+
+        logger.info(f"Profile written to {base_path}.*")
+
+
+class Null_Profiler:
+    """Stand-in used when profiling is off; every hook is a no-op."""
+
+    _stage = nullcontext()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def stage(self, name: str):
+        return self._stage
+
+
+NULL_PROFILER = Null_Profiler()
+
+
+def get_profiler(config: dict, request_id: str, requested: bool = False):
+    """
+    Returns a profiler for one request.
+
+    Parameters:
+    - config (dict): The "profiling" section of the configuration.
+    - request_id (str): Identifier used in the profile file names.
+    - requested (bool, optional): Whether the caller asked for a profile (e.g. via a request header).
+
+    Returns:
+    - Request_Profiler | Null_Profiler: A real profiler if profiling is enabled or requested, otherwise NULL_PROFILER.
+    """
+    if not (config.get("enabled", False) or requested):
+        return NULL_PROFILER
+
+    return Request_Profiler(
+        profile_dir=config.get("profile_dir", "profiles"),
+        request_id=request_id,
+        mode=config.get("mode", "sampling"),
+        interval=config.get("interval", 0.005),
+    )
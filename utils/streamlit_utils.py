@@ -1,8 +1,10 @@
 import re
 import requests
-import feedparser
 import streamlit as st
 
+# Seconds a feed validation result is reused across reruns
+VALIDATION_TTL_SECONDS = 300
+
 
 def is_valid_youtube_url(url: str) -> bool:
     """
@@ -15,6 +17,7 @@ def is_valid_youtube_url(url: str) -> bool:
     return re.match(pattern, url) is not None
 
 
+@st.cache_data(ttl=VALIDATION_TTL_SECONDS, show_spinner=False)
 def is_valid_rss_feed_url(url: str) -> bool:
     """
     Checks if the given URL is accessible by making an HTTP GET request.
@@ -32,24 +35,6 @@ def is_valid_rss_feed_url(url: str) -> bool:
         return False
 
 
-def is_rss_feed_episode_valid(source_url: str, episode_name: str) -> bool:
-    """
-    Checks if a given episode name exists in the RSS feed.
-
-    Parameters:
-    - source_url (str): The URL of the RSS feed.
-    - episode_name (str): The title of the episode to search for.
-
-    Returns:
-    - bool: True if an episode with the given name exists in the feed, False otherwise.
-    """
-    feed = feedparser.parse(source_url)
-    for entry in feed.entries:
-        if episode_name.lower() == entry.title.lower():
-            return True
-    return False
-
-
 def show_succesfully_downloaded(title: str):
     """
     Displays a success message for a downloaded episode.
@@ -79,3 +64,20 @@ def show_succesfully_summarized(text: str):
     st.subheader("✅ Summarized")
     st.markdown(text)
     st.divider()
+
+
+def show_pipeline_progress(stage: str, fraction: float):
+    """
+    Displays a progress bar for the stage that is currently running.
+
+    Parameters:
+    - stage (str): The running stage ("queued", "download", "transcribe" or "summarize").
+    - fraction (float): Completed fraction of the stage (0.0–1.0).
+    """
+    labels = {
+        "queued": "Waiting for a free worker...",
+        "download": "Downloading episode...",
+        "transcribe": "Transcribing episode...",
+        "summarize": "Summarizing transcription...",
+    }
+    st.progress(fraction, text=labels.get(stage, stage))
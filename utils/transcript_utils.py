@@ -0,0 +1,144 @@
+import re
+import json
+import html
+import logging
+import requests
+
+from typing import List
+
+logger = logging.getLogger(__name__)
+
+# Maps `podcast:transcript` MIME types and caption extensions to parser formats
+TRANSCRIPT_FORMATS = {
+    "text/vtt": "vtt",
+    "application/x-subrip": "srt",
+    "application/srt": "srt",
+    "text/srt": "srt",
+    "application/json": "json",
+    "text/html": "html",
+    "text/plain": "text",
+    "vtt": "vtt",
+    "srt": "srt",
+    "json3": "json",
+}
+
+TAG_PATTERN = re.compile(r"<[^>]+>")
+SENTENCE_END_PATTERN = re.compile(r"[.!?…]")
+
+# Auto-generated captions are unpunctuated; fewer sentence ends than one per
+# this many words means the cue boundaries have to serve as sentence boundaries
+MAX_WORDS_PER_SENTENCE = 40
+# Minimum words of a sentence built from consecutive cues
+MIN_WORDS_PER_SEGMENT = 12
+
+
+def fetch_transcript(url: str, fmt: str, timeout: int = 30) -> str:
+    """
+    Downloads a transcript or caption file and converts it to plain text.
+
+    Parameters:
+    - url (str): The transcript URL.
+    - fmt (str): One of "vtt", "srt", "json", "html" or "text".
+    - timeout (int, optional): Request timeout in seconds. Defaults to 30.
+
+    Returns:
+    - str: The normalized transcript text.
+    """
+    response = requests.get(url, timeout=timeout)
+    response.raise_for_status()
+    return normalize_transcript(response.text, fmt)
+
+
+def normalize_transcript(content: str, fmt: str) -> str:
+    """
+    Converts a transcript in a subtitle or JSON format to plain text.
+
+    Parameters:
+    - content (str): The raw transcript content.
+    - fmt (str): One of "vtt", "srt", "json", "html" or "text".
+
+    Returns:
+    - str: The transcript text with timing information and markup removed.
+      Unpunctuated captions are split into sentences at cue boundaries, so the
+      summarizer can chunk them.
+
+    Raises:
+    - ValueError: If the format is not supported.
+    """
+    if fmt in ("vtt", "srt"):
+        lines = _segment_unpunctuated(_parse_cues(content))
+    elif fmt == "json":
+        lines = _segment_unpunctuated(_parse_json(content))
+    elif fmt == "html":
+        lines = [html.unescape(TAG_PATTERN.sub(" ", content))]
+    elif fmt == "text":
+        lines = [content]
+    else:
+        raise ValueError(f"Unsupported transcript format: {fmt}")
+
+    return " ".join(" ".join(line.split()) for line in lines if line.strip())
+
+
+def _segment_unpunctuated(lines: List[str]) -> List[str]:
+    """
+    Ends a sentence at cue boundaries if the captions have (almost) no punctuation.
+
+    Consecutive cues are joined until they hold at least `MIN_WORDS_PER_SEGMENT`
+    words, and each group is terminated with a period.
+    """
+    words = sum(len(line.split()) for line in lines)
+    sentence_ends = sum(len(SENTENCE_END_PATTERN.findall(line)) for line in lines)
+    if words == 0 or sentence_ends * MAX_WORDS_PER_SENTENCE >= words:
+        return lines
+
+    segments, current = [], []
+    for line in lines:
+        current.extend(line.split())
+        if len(current) >= MIN_WORDS_PER_SEGMENT:
+            segments.append(" ".join(current).rstrip(".") + ".")
+            current = []
+    if current:
+        segments.append(" ".join(current).rstrip(".") + ".")
+    return segments
+
+
+def _parse_cues(content: str) -> List[str]:
+    """
+    Extracts cue text from SRT or WebVTT content.
+
+    Cue numbers, identifiers, timestamps, headers and NOTE blocks are dropped.
+    Auto-generated captions repeat each line while it scrolls, so consecutive
+    duplicates are collapsed.
+    """
+    lines = []
+    for block in re.split(r"\r?\n\s*\r?\n", content.strip()):
+        block_lines = block.splitlines()
+        timing_index = next(
+            (i for i, line in enumerate(block_lines) if "-->" in line), None
+        )
+        if timing_index is None:
+            continue  # Header, NOTE or STYLE block
+
+        for line in block_lines[timing_index + 1 :]:
+            text = html.unescape(TAG_PATTERN.sub("", line)).strip()
+            if text and (not lines or lines[-1] != text):
+                lines.append(text)
+    return lines
+
+
+def _parse_json(content: str) -> List[str]:
+    """
+    Extracts text from the Podcasting 2.0 JSON format ("segments" with "body")
+    or from YouTube's json3 caption format ("events" with "segs").
+    """
+    data = json.loads(content)
+
+    if "segments" in data:
+        return [segment.get("body", "") for segment in data["segments"]]
+
+    lines = []
+    for event in data.get("events", []):
+        text = "".join(seg.get("utf8", "") for seg in event.get("segs", []))
+        if text.strip():
+            lines.append(text)
+    return lines
@@ -1,151 +1,253 @@
 import os
-import math
-import whisper
+import shutil
 import logging
-import streamlit as st
 
-from openai import OpenAI
-from pydub import AudioSegment
+from typing import Callable, ContextManager, Optional
+from utils.checkpoint_utils import read_checkpoint, write_checkpoint
+from audio_fingerprint import Fingerprint_Index
+from asr_backends import ASR_Backend, OpenAI_API_Backend, get_asr_backend
 
 logger = logging.getLogger(__name__)
 
-MAX_FILE_SIZE_MB = 25
-MAX_FILE_SIZE_BYTES = MAX_FILE_SIZE_MB * 1024 * 1024
-
 
 class Whisper_Transcriber:
     """
-    A class for transcribing audio files using OpenAI's Whisper model.
+    A class for transcribing audio files using a pluggable Whisper backend.
 
     Attributes:
-        config (dict): Configuration dictionary containing settings like model type and verbose mode.
+        config (dict): Configuration dictionary containing settings like backend, model type and verbose mode.
         verbose (bool): Flag to enable or disable verbosing logs.
-        model (whisper.Whisper): Loaded Whisper model for transcription.
+        checkpoint (bool): Whether finished transcripts are stored and reused by retries.
+        backend (ASR_Backend): Speech recognition engine selected by `config["backend"]`.
+        fingerprint_index (Fingerprint_Index | None): Index of transcribed audio, reused across sources if enabled.
     """
 
     def __init__(self, config: dict):
         """
-        Initializes the WhisperTranscriber with a specific model size.
+        Initializes the WhisperTranscriber with the configured backend.
 
         Args:
-            config (dict): Configuration settings, including 'WHISPER_MODEL' and 'VERBOSE'.
+            config (dict): Configuration settings, including 'backend', 'model' and 'verbose'.
         """
         self.config = config
         self.verbose = config.get("verbose", False)
-        self.model = whisper.load_model(config.get("model", "base"))
-        self.client = OpenAI(api_key=st.secrets["OPENAI_API_KEY"])
-
-    def transcribe_api(self, audio_path: str, video_id: str) -> str:
-        base_dir = os.path.join(
-            os.getcwd(),
-            self.config.get("downloads_dir", "downloads"),
-            video_id,
-        )
-        transcript_path = os.path.join(
-            base_dir,
-            f"{video_id}{self.config.get('transcription_extension', '.txt')}",
+        self.checkpoint = config.get("checkpoint", True)
+        self.backend = get_asr_backend(config)
+        self._api_backend = None
+
+        fingerprint_config = config.get("fingerprint", {})
+        self.fingerprint_index = (
+            Fingerprint_Index(fingerprint_config)
+            if fingerprint_config.get("enabled", False)
+            else None
         )
 
-        if self.verbose and os.path.exists(transcript_path):
-            logger.info("Transcription already exists.")
-            with open(transcript_path, "r", encoding="utf-8") as file:
-                return file.read()
-
-        if self.verbose:
-            logger.info("Starting transcription...")
+        # The model is otherwise loaded by the first transcription
+        if config.get("warmup", False):
+            self.backend.warm_up()
+
+    def transcribe_api(
+        self,
+        audio_path: str,
+        video_id: str,
+        progress: Optional[Callable[[float, float], None]] = None,
+        on_segment: Optional[Callable[[str], None]] = None,
+        duration_seconds: float | None = None,
+        asr_slot: Optional[Callable[[], ContextManager]] = None,
+    ) -> str:
+        """
+        Transcribes an audio file using the hosted `whisper-1` API,
+        regardless of the configured backend.
 
-        transcribed_text = ""
+        Args:
+            audio_path (str): The file path of the audio to be transcribed.
+            video_id (str): Unique identifier for the audio/video.
+            progress (Callable, optional): Called as `progress(done, total)` as chunks complete.
+            on_segment (Callable, optional): Called with each piece of text as soon as the backend transcribes it; not called for a transcript reused from a checkpoint or fingerprint match.
+            duration_seconds (float | None, optional): Full duration of the episode from its metadata, compared with fingerprint matches.
+            asr_slot (Callable, optional): Called as `asr_slot()` around the backend run only, not around checkpoint or fingerprint lookups; returns a context manager that waits for a scheduler slot and yields its ticket (see `scheduler.Fair_Scheduler.slot`).
 
-        if os.path.getsize(audio_path) <= MAX_FILE_SIZE_BYTES:
-            # File is within size limit, process directly
-            with open(audio_path, "rb") as audio_file:
-                result = self.client.audio.transcriptions.create(
-                    model="whisper-1", file=audio_file, response_format="json"
-                )
-                transcribed_text = result.text
+        Returns:
+            str: The transcribed text.
+        """
+        if isinstance(self.backend, OpenAI_API_Backend):
+            api_backend = self.backend
         else:
-            if self.verbose:
-                size_mb = os.path.getsize(audio_path) / (1024 * 1024)
-                logger.info(
-                    f"Audio file exceeds 25MB ({size_mb:.2f} MB), splitting into chunks..."
-                )
-
-            audio = AudioSegment.from_file(audio_path)
-            duration_ms = len(audio)
-            estimated_size_per_ms = os.path.getsize(audio_path) / duration_ms
-            chunk_duration_ms = int(MAX_FILE_SIZE_BYTES / estimated_size_per_ms)
-
-            chunks = math.ceil(duration_ms / chunk_duration_ms)
-
-            os.makedirs(base_dir, exist_ok=True)
-
-            for i in range(chunks):
-                start_ms = i * chunk_duration_ms
-                end_ms = min((i + 1) * chunk_duration_ms, duration_ms)
-                chunk = audio[start_ms:end_ms]
+            if self._api_backend is None:
+                self._api_backend = OpenAI_API_Backend(self.config)
+            api_backend = self._api_backend
 
-                chunk_path = os.path.join(
-                    base_dir, f"{video_id}_{i+1}{self.config.get('mp3_ext', '.mp3')}"
-                )
-
-                chunk.export(chunk_path, format="mp3")
-
-                with open(chunk_path, "rb") as audio_file:
-                    result = self.client.audio.transcriptions.create(
-                        model="whisper-1", file=audio_file, response_format="json"
-                    )
-                    transcribed_text += result.text
-
-                if self.verbose:
-                    logger.info(f"Processed chunk {i + 1} of {chunks}")
+        return self._transcribe_with(
+            api_backend,
+            audio_path,
+            video_id,
+            progress,
+            on_segment,
+            duration_seconds,
+            asr_slot,
+        )
 
-                os.remove(chunk_path)
+    def transcribe(
+        self,
+        audio_path: str,
+        video_id: str,
+        progress: Optional[Callable[[float, float], None]] = None,
+        on_segment: Optional[Callable[[str], None]] = None,
+        duration_seconds: float | None = None,
+        asr_slot: Optional[Callable[[], ContextManager]] = None,
+    ) -> str:
+        """
+        Transcribes an audio file into text using the configured backend.
 
-        if self.verbose:
-            with open(transcript_path, "w", encoding="utf-8") as file:
-                file.write(transcribed_text)
-            logger.info(f"Transcript saved at: {transcript_path}")
+        Args:
+            audio_path (str): The file path of the audio to be transcribed.
+            video_id (str): Unique identifier for the audio/video.
+            progress (Callable, optional): Called as `progress(done, total)` as the audio is processed.
+            on_segment (Callable, optional): Called with each piece of text as soon as the backend transcribes it; not called for a transcript reused from a checkpoint or fingerprint match.
+            duration_seconds (float | None, optional): Full duration of the episode from its metadata, compared with fingerprint matches.
+            asr_slot (Callable, optional): Called as `asr_slot()` around the backend run only, not around checkpoint or fingerprint lookups; returns a context manager that waits for a scheduler slot and yields its ticket (see `scheduler.Fair_Scheduler.slot`).
 
-        return transcribed_text
+        Returns:
+            str: The transcribed text.
+        """
+        return self._transcribe_with(
+            self.backend,
+            audio_path,
+            video_id,
+            progress,
+            on_segment,
+            duration_seconds,
+            asr_slot,
+        )
 
-    def transcribe(self, audio_path: str, video_id: str) -> str:
+    def find_existing_transcript(
+        self, audio_path: str, video_id: str, duration_seconds: float | None = None
+    ) -> str | None:
         """
-        Transcribes an audio file into text using the Whisper model.
+        Looks up a transcript of the same audio, possibly from another source,
+        by its acoustic fingerprint. A match is stored as this episode's transcript.
 
         Args:
-            audio_path (str): The file path of the audio to be transcribed.
+            audio_path (str): The audio file, or the beginning of it.
             video_id (str): Unique identifier for the audio/video.
+            duration_seconds (float | None, optional): Full duration of the episode from its metadata.
 
         Returns:
-            str: The transcribed text.
+            str | None: The transcript of the matching episode, or None.
         """
-        transcript_path = os.path.join(
+        if self.fingerprint_index is None:
+            return None
+
+        text, _ = self._match_fingerprint(audio_path, video_id, duration_seconds)
+        return text
+
+    def _match_fingerprint(
+        self, audio_path: str, video_id: str, duration_seconds: float | None = None
+    ) -> tuple:
+        """Returns (transcript_text | None, fingerprint) for an audio file."""
+        try:
+            fingerprint = self.fingerprint_index.fingerprint(audio_path)
+        except Exception as e:
+            logger.warning(f"Failed to fingerprint audio: {e}")
+            return None, None
+
+        match = self.fingerprint_index.lookup(
+            fingerprint, exclude_id=video_id, duration_seconds=duration_seconds
+        )
+        if match is None:
+            return None, fingerprint
+
+        text = read_checkpoint(match["transcript_path"])
+        if text is None:
+            return None, fingerprint
+
+        logger.info(
+            f"Reusing transcript of {match['episode_id']} "
+            f"(bit error rate {match['bit_error_rate']:.2f})"
+        )
+        if self.verbose or self.checkpoint:
+            write_checkpoint(self._transcript_path(video_id), text)
+        return text, fingerprint
+
+    def _transcript_path(self, video_id: str) -> str:
+        return os.path.join(
             os.getcwd(),
             self.config.get("downloads_dir", "downloads"),
             video_id,
             f"{video_id}{self.config.get('transcription_extension', '.txt')}",
         )
 
+    def _transcribe_with(
+        self,
+        backend: ASR_Backend,
+        audio_path: str,
+        video_id: str,
+        progress: Optional[Callable[[float, float], None]] = None,
+        on_segment: Optional[Callable[[str], None]] = None,
+        duration_seconds: float | None = None,
+        asr_slot: Optional[Callable[[], ContextManager]] = None,
+    ) -> str:
+        """Runs a backend, reusing and storing the transcript as a checkpoint."""
+        base_dir = os.path.join(
+            os.getcwd(),
+            self.config.get("downloads_dir", "downloads"),
+            video_id,
+        )
+        transcript_path = self._transcript_path(video_id)
+        keep_transcript = self.verbose or self.checkpoint
+
         # Check if a transcription already exists to avoid re-processing
-        if self.verbose and os.path.exists(transcript_path):
-            logger.info("Transcription already exists.")
-            with open(transcript_path, "r", encoding="utf-8") as file:
-                return file.read()
+        if keep_transcript:
+            transcribed_text = read_checkpoint(transcript_path)
+            if transcribed_text is not None:
+                logger.info("Transcription already exists.")
+                return transcribed_text
+
+        # The same audio may already be transcribed under another source's id
+        fingerprint = None
+        if self.fingerprint_index is not None:
+            transcribed_text, fingerprint = self._match_fingerprint(
+                audio_path, video_id, duration_seconds
+            )
+            if transcribed_text is not None:
+                if progress:
+                    progress(1, 1)
+                return transcribed_text
 
         if self.verbose:
             logger.info("Starting transcription...")
 
-        # Perform transcription
-        result = self.model.transcribe(audio_path)
+        # Perform transcription, holding the model only while the backend runs
+        if asr_slot is None:
+            transcribed_text = backend.transcribe(
+                audio_path, video_id, progress, on_segment
+            )
+        else:
+            with asr_slot() as asr_ticket:
+
+                def on_progress(done: float, total: float):
+                    if progress:
+                        progress(done, total)
+                    # A chunk boundary: waiting interactive work may take over the model here
+                    asr_ticket.checkpoint()
+
+                transcribed_text = backend.transcribe(
+                    audio_path, video_id, on_progress, on_segment
+                )
 
         if self.verbose:
             logger.info("Transcription finished.")
 
-        transcribed_text = result.get("text", "")
+        if keep_transcript:
+            write_checkpoint(transcript_path, transcribed_text)
+            logger.info(f"Transcript saved at: {transcript_path}")
 
-        if self.verbose:
-            with open(transcript_path, "w", encoding="utf-8") as file:
-                file.write(transcribed_text)
-                logger.info(f"Transcript saved at: {transcript_path}")
+            # Per-slice checkpoints are superseded by the full transcript
+            shutil.rmtree(os.path.join(base_dir, "checkpoints"), ignore_errors=True)
+
+            if fingerprint:
+                self.fingerprint_index.add(
+                    video_id, fingerprint, transcript_path, duration_seconds
+                )
 
         return transcribed_text
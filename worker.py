@@ -0,0 +1,168 @@
+import time
+
+START_TIME = time.perf_counter()
+
+import os
+import json
+import socket
+import logging
+import argparse
+import threading
+
+from dotenv import load_dotenv
+from pipeline import run_pipeline
+from job_queue import SQLite_Job_Queue
+from openai_summarizer import OpenAI_Summarizer
+from youtube_downloader import YouTube_Downloader
+from whisper_transcriber import Whisper_Transcriber
+from rss_feed_downloader import RSS_Feed_Downloader
+from utils.profiling_utils import get_profiler
+
+# Load env & config
+load_dotenv(override=True)
+with open("config.json") as f:
+    config = json.load(f)
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(message)s",
+    datefmt="%d-%m-%Y %H:%M:%S",
+)
+logger = logging.getLogger(__name__)
+
+
+class Lease_Lost(Exception):
+    """Raised into the pipeline once another worker has taken the job over."""
+
+
+class Lease_Keeper:
+    """
+    Renews a job's lease from a background thread while the pipeline runs,
+    and records the current stage so API processes can report it.
+
+    If the lease is lost, the next progress callback raises Lease_Lost, so the
+    run stops instead of duplicating the new owner's transcription and
+    summarization.
+    """
+
+    def __init__(
+        self, queue: SQLite_Job_Queue, job_id: str, worker_id: str, lease_seconds: float
+    ):
+        self.queue = queue
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.stage = None
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+    def progress(self, stage: str, done: float, total: float):
+        """
+        Progress callback handed to `run_pipeline`.
+
+        Raises:
+            Lease_Lost: If another worker has taken the job over.
+        """
+        if stage != self.stage:
+            self.stage = stage
+            self._renew()
+        if self.lost:
+            raise Lease_Lost(f"Lost the lease on job {self.job_id}")
+
+    def _run(self):
+        while not self._stop.wait(self.lease_seconds / 3):
+            self._renew()
+
+    def _renew(self):
+        if not self.queue.heartbeat(
+            self.job_id, self.worker_id, self.lease_seconds, self.stage
+        ):
+            if not self.lost:
+                logger.warning(f"Lost the lease on job {self.job_id}")
+            self.lost = True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Runs summarization jobs from the shared queue.")
+    parser.add_argument(
+        "--worker-id",
+        default=f"{socket.gethostname()}-{os.getpid()}",
+        help="Unique name of this worker. Defaults to <hostname>-<pid>.",
+    )
+    args = parser.parse_args()
+
+    queue_config = config.get("queue", {})
+    lease_seconds = queue_config.get("lease_seconds", 60)
+    poll_interval = queue_config.get("poll_interval", 2)
+
+    queue = SQLite_Job_Queue(
+        queue_config.get("db_path", "queue/jobs.sqlite3"),
+        max_attempts=queue_config.get("max_attempts", 3),
+    )
+    downloaders = {
+        "youtube": YouTube_Downloader(config=config["youtube"]),
+        "rss": RSS_Feed_Downloader(config=config["rss"]),
+    }
+    transcriber = Whisper_Transcriber(config=config["whisper"])
+    summarizer = OpenAI_Summarizer(config=config["openai"])
+
+    if config["whisper"].get("warmup", False):
+        # Load the model before taking work rather than on the first job
+        transcriber.backend.warm_up().join()
+
+    logger.info(
+        f"Worker {args.worker_id} ready in {time.perf_counter() - START_TIME:.3f}s"
+    )
+
+    while True:
+        job = queue.claim(args.worker_id, lease_seconds)
+        if job is None:
+            time.sleep(poll_interval)
+            continue
+
+        payload = job["payload"]
+        logger.info(f"Claimed job {job['id']} (attempt {job['attempts']})")
+
+        with Lease_Keeper(queue, job["id"], args.worker_id, lease_seconds) as lease:
+            try:
+                result = run_pipeline(
+                    downloader=downloaders.get(payload.get("platform"), downloaders["rss"]),
+                    transcriber=transcriber,
+                    summarizer=summarizer,
+                    source_url=payload.get("source_url"),
+                    episode_name=payload.get("episode_name"),
+                    detail_level=payload.get("detail_level", 0.0),
+                    progress=lease.progress,
+                    profiler=get_profiler(
+                        config.get("profiling", {}),
+                        request_id=job["id"],
+                        requested=payload.get("profile", False),
+                    ),
+                )
+            except Lease_Lost:
+                logger.warning(f"Stopped job {job['id']}, another worker took it over")
+                continue
+            except Exception as e:
+                logger.exception(f"Job {job['id']} failed")
+                queue.fail(job["id"], args.worker_id, str(e))
+                continue
+
+        if not queue.complete(job["id"], args.worker_id, result):
+            logger.warning(f"Discarded result of job {job['id']}, the lease was lost")
+        else:
+            logger.info(f"Completed job {job['id']}")
+
+
+if __name__ == "__main__":
+    main()
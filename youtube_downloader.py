@@ -1,25 +1,47 @@
 import os
+import copy
 import json
+import time
 import logging
+import threading
 
-from typing import Tuple
-from yt_dlp import YoutubeDL
+from typing import Callable, Optional, Tuple
 from downloader import Downloader
+from utils.transcript_utils import TRANSCRIPT_FORMATS, fetch_transcript
 
 logger = logging.getLogger(__name__)
 
 
 class YouTube_Downloader(Downloader):
-    """Downloads YouTube videos as MP3 and retrieves metadata."""
+    """
+    Downloads YouTube videos as MP3 and retrieves metadata.
+
+    One request needs the video info several times (admission probe,
+    captions, audio and metadata download), so the info extracted by yt-dlp
+    is kept for `info_cache_seconds` and the video page is fetched once per
+    request.
+    """
 
     def __init__(self, config: dict):
         self.config = config
         self.debug = self.config.get("debug", False)
+        self.info_cache_seconds = self.config.get("info_cache_seconds", 300)
+
+        self._infos = {}
+        self._infos_lock = threading.Lock()
 
     def download_episode(
-        self, source_url: str, episode_name: str | None
+        self,
+        source_url: str,
+        episode_name: str | None,
+        on_prefix: Optional[Callable[[str, dict], bool]] = None,
     ) -> Tuple[str, dict]:
-        """Downloads both the MP3 file and metadata, then logs key details."""
+        """
+        Downloads both the MP3 file and metadata, then logs key details.
+
+        yt-dlp converts the audio only once it is fully downloaded, so
+        `on_prefix` is not used; the transcriber checks the finished file instead.
+        """
         self.source_url = source_url.split("&")[0]
         self.video_id = self.source_url.split("=")[-1]
 
@@ -28,6 +50,113 @@ class YouTube_Downloader(Downloader):
 
         return mp3_path, metadata
 
+    def fetch_transcript(
+        self, source_url: str, episode_name: str | None
+    ) -> Tuple[str | None, dict]:
+        """
+        Fetches the video's captions instead of downloading its audio.
+
+        Uploaded subtitles are preferred over automatic captions; the latter are
+        only used if "use_automatic_captions" is enabled.
+
+        Returns:
+            tuple: (transcript_text (str | None), metadata (dict)).
+        """
+        if not self.config.get("use_existing_transcripts", True):
+            return None, {}
+
+        self.source_url = source_url.split("&")[0]
+        self.video_id = self.source_url.split("=")[-1]
+
+        try:
+            info = self._get_info(self.source_url)
+            track = self._pick_caption_track(info)
+            if track is None:
+                return None, {}
+
+            text = fetch_transcript(track["url"], TRANSCRIPT_FORMATS[track["ext"]])
+        except Exception as e:
+            logger.warning(f"Failed to fetch captions: {e}")
+            return None, {}
+
+        if self.debug:
+            logger.info(f"Using existing captions ({track['ext']}).")
+
+        metadata = {
+            key: info.get(key, "")
+            for key in (
+                "id",
+                "title",
+                "thumbnail",
+                "channel",
+                "duration_string",
+                "release_date",
+                "channel_id",
+            )
+        }
+        return text, metadata
+
+    def probe_episode(self, source_url: str, episode_name: str | None) -> dict:
+        """
+        Reads the duration and approximate audio size from a yt-dlp info probe.
+
+        Returns:
+            dict: "duration_seconds" and "size_bytes", either of which may be None if unknown.
+        """
+        info = self._get_info(source_url.split("&")[0])
+
+        # Size of the best audio-only format, which is what gets downloaded
+        audio_sizes = [
+            f.get("filesize") or f.get("filesize_approx")
+            for f in info.get("formats") or []
+            if f.get("vcodec") == "none"
+        ]
+        audio_sizes = [size for size in audio_sizes if size]
+
+        return {
+            "duration_seconds": info.get("duration"),
+            "size_bytes": max(audio_sizes) if audio_sizes else None,
+        }
+
+    def _get_info(self, url: str) -> dict:
+        """
+        Extracts the video info without resolving formats, reusing an info
+        extracted within the last `info_cache_seconds`.
+
+        Returns:
+            dict: The unprocessed yt-dlp info; copy it before passing it to yt-dlp.
+        """
+        now = time.monotonic()
+        with self._infos_lock:
+            cached = self._infos.get(url)
+            if cached is not None and now - cached[0] < self.info_cache_seconds:
+                return cached[1]
+
+        with self._youtube_dl({"skip_download": True, "quiet": True}) as ydl:
+            info = ydl.extract_info(url, download=False, process=False)
+
+        with self._infos_lock:
+            self._infos = {
+                k: v for k, v in self._infos.items() if now - v[0] < self.info_cache_seconds
+            }
+            self._infos[url] = (now, info)
+        return info
+
+    def _pick_caption_track(self, info: dict) -> dict | None:
+        """Picks the first caption track in a preferred language and parseable format."""
+        sources = [info.get("subtitles") or {}]
+        if self.config.get("use_automatic_captions", True):
+            sources.append(info.get("automatic_captions") or {})
+
+        for captions in sources:
+            for language in self.config.get("transcript_languages", ["en"]):
+                tracks = captions.get(language, [])
+                for ext in ("json3", "vtt", "srt"):
+                    for track in tracks:
+                        if track.get("ext") == ext and track.get("url"):
+                            return track
+        return None
+
     def _download_mp3(self) -> str:
         """Downloads the video as an MP3 file."""
         return self._download_file(
@@ -61,11 +190,12 @@ class YouTube_Downloader(Downloader):
                 logger.info(f"File already exists ({extension}).")
                 return output_path
 
-        with YoutubeDL(
+        with self._youtube_dl(
             self._get_ydl_opts(self.config.get("downloads_dir"), audio_only)
         ) as ydl:
             try:
-                ydl.download([self.source_url])
+                # Resolves formats and downloads from the cached info, without fetching the page again
+                ydl.process_ie_result(copy.deepcopy(self._get_info(self.source_url)))
             except Exception as e:
                 logger.error(f"Failed to download {extension}: {e}")
                 raise
@@ -75,6 +205,12 @@ class YouTube_Downloader(Downloader):
 
         return output_path
 
+    def _youtube_dl(self, opts: dict):
+        """Creates a yt-dlp instance, importing yt-dlp on first use."""
+        from yt_dlp import YoutubeDL
+
+        return YoutubeDL(opts)
+
     def _get_ydl_opts(self, output_dir: str, audio_only: bool = False) -> dict:
         """
         Generates configuration options for yt-dlp based on download requirements.